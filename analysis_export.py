@@ -0,0 +1,102 @@
+# ===============================
+# ANALYSIS EXPORT
+# Chunked CSV and Parquet encoders for history and stored analyses
+# ===============================
+
+import io
+import time
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is offered only when pyarrow is installed
+    pa = None
+
+from analysis_history import RISK_BANDS
+
+EXPORT_MIME_TYPES = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet'
+}
+
+
+def export_formats():
+    return [fmt for fmt in EXPORT_MIME_TYPES if fmt != 'parquet' or pa is not None]
+
+
+def store_frames(pages):
+    """Turn AnalysisStore.iter_pages output into export DataFrames"""
+    for page in pages:
+        yield pd.DataFrame({
+            'timestamp': [time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(row['timestamp'])) for row in page],
+            'text_preview': [row['text_preview'] for row in page],
+            'overall_risk': [row['overall_risk'] for row in page],
+            'risk_band': [RISK_BANDS[row['risk_band']] for row in page],
+            'pattern_count': [row['pattern_count'] for row in page],
+            'patterns_detected': [row['patterns_detected'] for row in page],
+            'word_count': [row['word_count'] for row in page]
+        })
+
+
+def iter_csv(frames):
+    """CSV bytes, one piece per frame; the header goes out with the first"""
+    header = True
+    for frame in frames:
+        yield frame.to_csv(index=False, header=header).encode('utf-8')
+        header = False
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain"""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def iter_parquet(frames):
+    """Parquet bytes with one row group per frame.
+
+    The schema is taken from the first frame; list columns that are empty
+    there are typed as lists of strings so later frames still fit.
+    """
+    sink = _ChunkSink()
+    writer = None
+    for frame in frames:
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        if writer is None:
+            schema = pa.schema([
+                field.with_type(pa.list_(pa.string())) if field.type == pa.list_(pa.null()) else field
+                for field in table.schema
+            ]).remove_metadata()
+            writer = pq.ParquetWriter(sink, schema)
+        writer.write_table(table.cast(schema))
+        yield sink.drain()
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
+
+
+def iter_export(frames, fmt='csv'):
+    """Encoded export in `fmt`, produced chunk by chunk from `frames`"""
+    if fmt not in export_formats():
+        raise ValueError(f"Unsupported export format: {fmt}")
+    return iter_csv(frames) if fmt == 'csv' else iter_parquet(frames)
@@ -0,0 +1,165 @@
+# ===============================
+# ANALYSIS HISTORY STORE
+# Bounded ring buffer of typed columns with running aggregates
+# ===============================
+
+import time
+
+import numpy as np
+import pandas as pd
+
+RISK_BINS = (0, 0.2, 0.4, 0.6, 0.8, 1.0)
+RISK_BIN_LABELS = ('0-20%', '21-40%', '41-60%', '61-80%', '81-100%')
+RISK_BANDS = ('Low', 'Medium', 'High')
+
+
+def risk_band(risk):
+    """Sidebar bands: Low below 0.4, High above 0.7"""
+    return 0 if risk < 0.4 else 2 if risk > 0.7 else 1
+
+
+def risk_bin(risk):
+    """Right-closed dashboard bins, as pd.cut(bins=RISK_BINS); -1 when outside"""
+    index = int(np.searchsorted(RISK_BINS, risk, side='left')) - 1
+    return index if 0 <= index < len(RISK_BIN_LABELS) else -1
+
+
+class AnalysisHistory:
+    """Keeps the most recent `capacity` analyses in fixed-size typed arrays.
+
+    Older entries are overwritten ring-buffer style. Counts per risk band,
+    risk bin and pattern, plus risk and pattern-count sums, are updated on
+    every append and eviction, so summary reads do not touch the arrays.
+    """
+
+    def __init__(self, pattern_ids, capacity=500):
+        self.pattern_ids = list(pattern_ids)
+        self.capacity = capacity
+        self._index = {pattern_id: i for i, pattern_id in enumerate(self.pattern_ids)}
+
+        self.risk = np.zeros(capacity, dtype=np.float32)
+        # One bit per pattern, packed into bytes, so registries of any size fit
+        self.pattern_mask = np.zeros((capacity, (len(self.pattern_ids) + 7) // 8), dtype=np.uint8)
+        self.pattern_count = np.zeros(capacity, dtype=np.uint8)
+        self.word_count = np.zeros(capacity, dtype=np.uint32)
+        self.timestamp = np.zeros(capacity, dtype=np.int64)
+        self.preview = np.empty(capacity, dtype=object)
+        self.clear()
+
+    def clear(self):
+        self._next = 0
+        self._size = 0
+        self._risk_sum = 0.0
+        self._pattern_count_sum = 0
+        self._max_risk = 0.0
+        self._band_counts = np.zeros(len(RISK_BANDS), dtype=np.int64)
+        self._bin_counts = np.zeros(len(RISK_BIN_LABELS), dtype=np.int64)
+        self._pattern_totals = np.zeros(len(self.pattern_ids), dtype=np.int64)
+
+    def __len__(self):
+        return self._size
+
+    def _order(self):
+        """Ring positions from oldest to newest"""
+        start = (self._next - self._size) % self.capacity
+        return (start + np.arange(self._size)) % self.capacity
+
+    def _pattern_bits(self, masks):
+        """Unpack one packed mask, or a stack of them, to 0/1 per pattern"""
+        return np.unpackbits(masks, axis=-1, count=len(self.pattern_ids), bitorder='little')
+
+    def _pattern_lists(self, masks):
+        return [[self.pattern_ids[i] for i in np.flatnonzero(bits)] for bits in self._pattern_bits(masks)]
+
+    def _account(self, slot, sign):
+        risk = float(self.risk[slot])
+        self._risk_sum += sign * risk
+        self._pattern_count_sum += sign * int(self.pattern_count[slot])
+        self._band_counts[risk_band(risk)] += sign
+        if risk_bin(risk) >= 0:
+            self._bin_counts[risk_bin(risk)] += sign
+        self._pattern_totals += sign * self._pattern_bits(self.pattern_mask[slot]).astype(np.int64)
+
+    def append(self, overall_risk, patterns_detected, word_count, text_preview='', timestamp=None):
+        slot = self._next
+        evicted_max = False
+        if self._size == self.capacity:
+            evicted_max = float(self.risk[slot]) >= self._max_risk
+            self._account(slot, -1)
+        else:
+            self._size += 1
+
+        bits = np.zeros(len(self.pattern_ids), dtype=bool)
+        bits[[self._index[p] for p in patterns_detected if p in self._index]] = True
+        self.risk[slot] = overall_risk
+        self.pattern_mask[slot] = np.packbits(bits, bitorder='little')
+        self.pattern_count[slot] = min(len(patterns_detected), 255)
+        self.word_count[slot] = word_count
+        self.timestamp[slot] = int(time.time() if timestamp is None else timestamp)
+        self.preview[slot] = text_preview
+        self._account(slot, +1)
+        self._next = (slot + 1) % self.capacity
+
+        if evicted_max:
+            self._max_risk = float(self.risk[self._order()].max())
+        else:
+            self._max_risk = max(self._max_risk, float(self.risk[slot]))
+
+    # Constant-time summaries
+    def mean_risk(self):
+        return self._risk_sum / self._size if self._size else 0.0
+
+    def max_risk(self):
+        return self._max_risk
+
+    def mean_pattern_count(self):
+        return self._pattern_count_sum / self._size if self._size else 0.0
+
+    def high_risk_count(self):
+        return int(self._band_counts[2])
+
+    def risk_band_counts(self):
+        return dict(zip(RISK_BANDS, self._band_counts.tolist()))
+
+    def risk_bin_counts(self):
+        return dict(zip(RISK_BIN_LABELS, self._bin_counts.tolist()))
+
+    def pattern_frequency(self, top=None):
+        """(pattern_id, count) pairs for detected patterns, most frequent first"""
+        order = np.argsort(-self._pattern_totals, kind='stable')
+        pairs = [(self.pattern_ids[i], int(self._pattern_totals[i])) for i in order if self._pattern_totals[i]]
+        return pairs[:top] if top else pairs
+
+    def recent(self, n=5):
+        """The newest `n` entries as dicts, oldest first"""
+        return [self.entry(slot) for slot in self._order()[-n:]]
+
+    def entry(self, slot):
+        return {
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(int(self.timestamp[slot]))),
+            'text_preview': self.preview[slot],
+            'overall_risk': float(self.risk[slot]),
+            'pattern_count': int(self.pattern_count[slot]),
+            'patterns_detected': self._pattern_lists(self.pattern_mask[slot:slot + 1])[0],
+            'word_count': int(self.word_count[slot])
+        }
+
+    def to_frame(self):
+        """All retained entries, oldest first, as a DataFrame"""
+        return self._frame(self._order())
+
+    def iter_frames(self, chunk_size=10000):
+        """The same rows as to_frame, `chunk_size` at a time"""
+        order = self._order()
+        for start in range(0, len(order), chunk_size):
+            yield self._frame(order[start:start + chunk_size])
+
+    def _frame(self, order):
+        return pd.DataFrame({
+            'timestamp': [time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(int(t))) for t in self.timestamp[order]],
+            'text_preview': self.preview[order],
+            'overall_risk': self.risk[order],
+            'pattern_count': self.pattern_count[order],
+            'patterns_detected': self._pattern_lists(self.pattern_mask[order]),
+            'word_count': self.word_count[order]
+        })
@@ -0,0 +1,138 @@
+# ===============================
+# PERSISTENT ANALYSIS STORE
+# Embedded SQLite store with indexed, paginated queries
+# ===============================
+
+import sqlite3
+import threading
+import time
+
+from analysis_history import RISK_BANDS, risk_band
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY,
+    timestamp INTEGER NOT NULL,
+    overall_risk REAL NOT NULL,
+    risk_band INTEGER NOT NULL,
+    authenticity_score REAL NOT NULL,
+    pattern_count INTEGER NOT NULL,
+    word_count INTEGER NOT NULL,
+    text_preview TEXT NOT NULL,
+    fingerprint TEXT
+);
+CREATE TABLE IF NOT EXISTS analysis_patterns (
+    analysis_id INTEGER NOT NULL REFERENCES analyses(id) ON DELETE CASCADE,
+    pattern_id TEXT NOT NULL,
+    risk_band INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    PRIMARY KEY (pattern_id, analysis_id)
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_timestamp ON analyses(timestamp);
+CREATE INDEX IF NOT EXISTS idx_analyses_band_timestamp ON analyses(risk_band, timestamp);
+CREATE INDEX IF NOT EXISTS idx_patterns_lookup ON analysis_patterns(pattern_id, risk_band, timestamp);
+CREATE INDEX IF NOT EXISTS idx_patterns_analysis ON analysis_patterns(analysis_id);
+'''
+
+
+class AnalysisStore:
+    """Persists analyses so the dashboard can query them without loading them all.
+
+    Every analysis gets one row in `analyses` plus one row per detected
+    pattern in `analysis_patterns`; the pattern rows repeat the risk band
+    and timestamp so pattern-filtered queries are answered from a single
+    index, and are also indexed by analysis so each result row gathers its
+    patterns without scanning the table.
+    """
+
+    def __init__(self, db_path):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA foreign_keys=ON')
+        self._db.executescript(SCHEMA)
+
+    def add(self, results, text_preview, timestamp=None, fingerprint=None):
+        """Store one analysis and return its row id"""
+        timestamp = int(time.time() if timestamp is None else timestamp)
+        band = risk_band(results['overall_risk_score'])
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                'INSERT INTO analyses (timestamp, overall_risk, risk_band, authenticity_score, '
+                'pattern_count, word_count, text_preview, fingerprint) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (timestamp, float(results['overall_risk_score']), band, float(results['authenticity_score']),
+                 results['pattern_count'], results['text_metrics']['word_count'], text_preview, fingerprint)
+            )
+            analysis_id = cursor.lastrowid
+            self._db.executemany(
+                'INSERT INTO analysis_patterns (analysis_id, pattern_id, risk_band, timestamp) VALUES (?, ?, ?, ?)',
+                [(analysis_id, pattern_id, band, timestamp) for pattern_id in results['patterns_detected']]
+            )
+        return analysis_id
+
+    def _where(self, risk_band=None, pattern_id=None, since=None, until=None, before=None):
+        """SQL filter over `analyses a`; bands are given by name ('High') or index"""
+        clauses = []
+        params = []
+        if isinstance(risk_band, str):
+            risk_band = RISK_BANDS.index(risk_band)
+        if since is not None:
+            since = int(since)
+        if pattern_id is not None:
+            clauses.append('a.id IN (SELECT analysis_id FROM analysis_patterns p WHERE p.pattern_id = ?'
+                           + (' AND p.risk_band = ?' if risk_band is not None else '')
+                           + (' AND p.timestamp >= ?' if since is not None else '') + ')')
+            params.append(pattern_id)
+            params.extend(v for v in (risk_band, since) if v is not None)
+        if risk_band is not None:
+            clauses.append('a.risk_band = ?')
+            params.append(risk_band)
+        if since is not None:
+            clauses.append('a.timestamp >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('a.timestamp < ?')
+            params.append(int(until))
+        if before is not None:
+            clauses.append('(a.timestamp, a.id) < (?, ?)')
+            params.extend(before)
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def query(self, risk_band=None, pattern_id=None, since=None, until=None,
+              limit=50, offset=0, before=None):
+        """Matching analyses, newest first, one page at a time.
+
+        Page with `offset`, or pass the last row's (timestamp, id) as
+        `before` to seek straight to the next page however deep it is.
+        """
+        where, params = self._where(risk_band, pattern_id, since, until, before)
+        sql = (
+            'SELECT a.*, (SELECT group_concat(pattern_id) FROM analysis_patterns p WHERE p.analysis_id = a.id) '
+            f'AS patterns_detected FROM analyses a{where} ORDER BY a.timestamp DESC, a.id DESC LIMIT ? OFFSET ?'
+        )
+        with self._lock:
+            rows = self._db.execute(sql, params + [limit, offset]).fetchall()
+        return [
+            {**dict(row), 'patterns_detected': row['patterns_detected'].split(',') if row['patterns_detected'] else []}
+            for row in rows
+        ]
+
+    def iter_pages(self, risk_band=None, pattern_id=None, since=None, until=None, page_size=1000):
+        """Every matching analysis, newest first, as successive query pages"""
+        before = None
+        while True:
+            page = self.query(risk_band, pattern_id, since, until, limit=page_size, before=before)
+            if not page:
+                return
+            yield page
+            before = (page[-1]['timestamp'], page[-1]['id'])
+
+    def count(self, risk_band=None, pattern_id=None, since=None, until=None):
+        where, params = self._where(risk_band, pattern_id, since, until)
+        with self._lock:
+            return self._db.execute(f'SELECT COUNT(*) FROM analyses a{where}', params).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,230 @@
+# ===============================
+# PATTERN ENGINE BENCHMARK
+# Reproducible throughput, latency and memory measurements
+# ===============================
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Batch-mode peak memory is reported only where getrusage exists
+    resource = None
+
+from pattern_engine import PatternRecognitionEngine, create_pattern_database, SENTENCE_SPLIT_RE
+from score_corpus import iter_documents, iter_scores
+
+# Approximate words per synthetic document
+DOC_SIZES = {'tweet': 40, 'article': 800, 'report': 8000}
+CORPUS_SIZES = (100, 500)
+MODES = ('single', 'batch', 'streaming')
+
+
+# -------------------------------
+# SYNTHETIC CORPORA
+# -------------------------------
+def case_study_sentences():
+    """Sentences from the case studies, each with its closing punctuation"""
+    sentences = []
+    for case in create_pattern_database()['case_studies']:
+        text = case['text']
+        start = 0
+        for match in SENTENCE_SPLIT_RE.finditer(text):
+            sentence = text[start:match.end()].strip()
+            if sentence:
+                sentences.append(sentence)
+            start = match.end()
+        if text[start:].strip():
+            sentences.append(text[start:].strip() + '.')
+    return sentences
+
+
+def synthetic_corpus(doc_size, corpus_size, seed=0):
+    """Build `corpus_size` documents of about DOC_SIZES[doc_size] words each"""
+    rnd = random.Random(f"{seed}:{doc_size}:{corpus_size}")
+    sentences = case_study_sentences()
+    target = DOC_SIZES[doc_size]
+    corpus = []
+    for _ in range(corpus_size):
+        parts = []
+        words = 0
+        while words < target:
+            sentence = rnd.choice(sentences)
+            parts.append(sentence)
+            words += len(sentence.split())
+        corpus.append(' '.join(parts))
+    return corpus
+
+# -------------------------------
+# MODES
+# -------------------------------
+def run_single(engine, corpus):
+    latencies = []
+    for text in corpus:
+        started = time.perf_counter()
+        engine.analyze_patterns(text)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def run_batch(engine, corpus, workers=None):
+    """Latency here is time from submitting the batch to each result arriving"""
+    latencies = []
+    started = time.perf_counter()
+    for _ in engine.analyze_batch(corpus, workers=workers, ordered=False):
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def run_streaming(engine, corpus):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'corpus.jsonl')
+        with open(path, 'w', encoding='utf-8') as f:
+            for i, text in enumerate(corpus):
+                f.write(json.dumps({'id': i, 'text': text}) + '\n')
+
+        latencies = []
+        scores = iter_scores(engine, iter_documents(path))
+        while True:
+            started = time.perf_counter()
+            if next(scores, None) is None:
+                break
+            latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def _max_rss_mb(who):
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return resource.getrusage(who).ru_maxrss / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10)
+
+
+def _batch_peak_mb(engine, corpus, workers):
+    """Largest peak RSS among the processes of one batch run, in a fresh process.
+
+    ru_maxrss for children covers every child ever waited for, so the run
+    gets a process of its own and earlier runs cannot leak into its figure.
+    """
+    run_batch(engine, corpus, workers)
+    return max(_max_rss_mb(resource.RUSAGE_SELF), _max_rss_mb(resource.RUSAGE_CHILDREN))
+
+
+def measure(mode, engine, corpus, workers=None, track_memory=True):
+    runner = {'single': run_single, 'batch': run_batch, 'streaming': run_streaming}[mode]
+    args = (engine, corpus, workers) if mode == 'batch' else (engine, corpus)
+
+    started = time.perf_counter()
+    latencies = np.array(runner(*args))
+    elapsed = time.perf_counter() - started
+
+    peak_mb = None
+    # tracemalloc only sees this process, so batch mode, which works in
+    # worker processes, reports their peak resident size instead
+    if track_memory and mode == 'batch':
+        if resource is not None:
+            with ProcessPoolExecutor(1) as executor:
+                peak_mb = executor.submit(_batch_peak_mb, engine, corpus, workers).result()
+    elif track_memory:
+        # Separate pass so tracing overhead does not skew the timings
+        tracemalloc.start()
+        runner(*args)
+        peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+
+    return {
+        'docs_per_sec': len(corpus) / elapsed if elapsed else None,
+        'p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'p99_ms': float(np.percentile(latencies, 99) * 1000),
+        'peak_mb': peak_mb
+    }
+
+# -------------------------------
+# SUITE AND BASELINES
+# -------------------------------
+def run_suite(doc_sizes=tuple(DOC_SIZES), corpus_sizes=CORPUS_SIZES, modes=MODES,
+              workers=None, seed=0, track_memory=True, log=print):
+    engine = PatternRecognitionEngine()
+    results = {}
+    for doc_size in doc_sizes:
+        for corpus_size in corpus_sizes:
+            corpus = synthetic_corpus(doc_size, corpus_size, seed)
+            for mode in modes:
+                key = f"{mode}/{doc_size}/{corpus_size}"
+                results[key] = measure(mode, engine, corpus, workers, track_memory)
+                log(format_row(key, results[key]))
+    return {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'seed': seed,
+        'cpu_count': os.cpu_count(),
+        'results': results
+    }
+
+
+def compare(current, baseline, tolerance=0.10):
+    """List regressions: throughput down, or p99 latency or peak memory up, by more than `tolerance`"""
+    regressions = []
+    for key, now in current['results'].items():
+        before = baseline['results'].get(key)
+        if before is None:
+            continue
+        if before['docs_per_sec'] and now['docs_per_sec'] < before['docs_per_sec'] * (1 - tolerance):
+            regressions.append(f"{key}: docs/sec {before['docs_per_sec']:.1f} -> {now['docs_per_sec']:.1f}")
+        if now['p99_ms'] > before['p99_ms'] * (1 + tolerance):
+            regressions.append(f"{key}: p99 {before['p99_ms']:.2f} ms -> {now['p99_ms']:.2f} ms")
+        # Peak memory is compared only when both runs measured it
+        if (before.get('peak_mb') and now.get('peak_mb') is not None
+                and now['peak_mb'] > before['peak_mb'] * (1 + tolerance)):
+            regressions.append(f"{key}: peak {before['peak_mb']:.1f} MB -> {now['peak_mb']:.1f} MB")
+    return regressions
+
+
+def format_row(key, row):
+    memory = f"{row['peak_mb']:8.1f} MB" if row['peak_mb'] is not None else '       n/a'
+    return f"{key:<28} {row['docs_per_sec']:10.1f} docs/s  p50 {row['p50_ms']:9.2f} ms  p99 {row['p99_ms']:9.2f} ms  peak {memory}"
+
+# -------------------------------
+# COMMAND LINE
+# -------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the pattern recognition engine.')
+    parser.add_argument('--doc-sizes', nargs='+', choices=list(DOC_SIZES), default=list(DOC_SIZES))
+    parser.add_argument('--corpus-sizes', nargs='+', type=int, default=list(CORPUS_SIZES))
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    parser.add_argument('--workers', type=int, help='batch mode worker processes (default: all cores)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true',
+                        help='skip the peak-memory pass (traced, or worker RSS in batch mode)')
+    parser.add_argument('--save-baseline', help='write results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='allowed relative slowdown or memory growth')
+    args = parser.parse_args(argv)
+
+    current = run_suite(args.doc_sizes, args.corpus_sizes, args.modes, args.workers, args.seed,
+                        track_memory=not args.no_memory)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(current, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print("No regressions against baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
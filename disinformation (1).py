@@ -6,12 +6,43 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import re
+import html
+import os
 import random
+import tempfile
+import textwrap
 import time
-from datetime import datetime
-from collections import Counter
 
+from pattern_engine import PatternRecognitionEngine, IncrementalAnalyzer, create_pattern_database
+from pattern_cache import AnalysisCache
+from analysis_history import AnalysisHistory, RISK_BANDS
+from analysis_store import AnalysisStore
+from analysis_export import EXPORT_MIME_TYPES, export_formats, iter_export, store_frames
+from pipeline_metrics import MemorySink, configure as configure_metrics
+
+
+# Inputs longer than this show per-stage analysis progress
+LONG_INPUT_CHARS = 20000
+
+# Flagged sentences visible at once in the scrolling timeline table
+TIMELINE_VISIBLE_ROWS = 10
+
+# Pattern cards taller than this scroll inside their panel
+CARD_PANEL_MAX_HEIGHT = 720
+
+# Analyses kept per session; the oldest are dropped first
+HISTORY_CAPACITY = 500
+
+# Rows per page in the stored analyses table, paged by (timestamp, id) cursor
+STORE_PAGE_SIZE = 25
+
+# Rows encoded per chunk when exporting
+EXPORT_CHUNK_ROWS = 5000
+
+# Prepared exports are written here and removed once this old, so the
+# files of sessions that ended do not pile up
+EXPORT_DIR = os.environ.get('PATTERN_EXPORT_DIR', os.path.join(tempfile.gettempdir(), 'pattern_exports'))
+EXPORT_MAX_AGE_SECONDS = 3600
 
 # -------------------------------
 # APP CONFIGURATION
@@ -135,24 +166,9 @@ st.markdown("""
         border-radius: 50%;
         margin-right: 0.5rem;
     }
-    .pattern-timeline {
-        padding: 1rem;
-        background: white;
-        border-radius: 10px;
-        border: 1px solid #E5E7EB;
-    }
-    .timeline-item {
-        display: flex;
-        align-items: center;
-        margin: 0.5rem 0;
-        padding: 0.5rem;
-        border-radius: 6px;
-    }
-    .timeline-dot {
-        width: 10px;
-        height: 10px;
-        border-radius: 50%;
-        margin-right: 0.5rem;
+    .scroll-panel {
+        overflow-y: auto;
+        padding-right: 0.25rem;
     }
     .stButton > button {
         width: 100%;
@@ -224,297 +240,110 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # -------------------------------
-# DISINFORMATION PATTERN ANALYZER
+# SHARED RESOURCES
 # -------------------------------
-class PatternRecognitionEngine:
-    def __init__(self):
-        # Define disinformation patterns with confidence scores
-        self.patterns = {
-            'emotional_amplification': {
-                'name': 'Emotional Amplification',
-                'indicators': ['!!!', '??!', 'SHOCKING', 'AMAZING', 'HEARTBREAKING', 'TERRIFYING'],
-                'weight': 0.85,
-                'description': 'Uses excessive emotional language to bypass critical thinking'
-            },
-            'urgency_creation': {
-                'name': 'False Urgency',
-                'indicators': ['BREAKING', 'URGENT', 'NOW', 'IMMEDIATE', 'ACT FAST', 'LAST CHANCE'],
-                'weight': 0.78,
-                'description': 'Creates artificial time pressure to prevent fact-checking'
-            },
-            'source_obfuscation': {
-                'name': 'Source Obfuscation',
-                'indicators': ['they say', 'experts claim', 'studies show', 'many people'],
-                'weight': 0.72,
-                'description': 'Uses vague sources to avoid verification'
-            },
-            'binary_narrative': {
-                'name': 'Binary Narrative',
-                'indicators': ['always', 'never', 'everyone', 'no one', '100%', 'complete'],
-                'weight': 0.65,
-                'description': 'Presents complex issues as simple good/bad dichotomies'
-            },
-            'conspiracy_framing': {
-                'name': 'Conspiracy Framing',
-                'indicators': ['cover-up', 'hidden truth', 'they don\'t want you to know', 'mainstream media'],
-                'weight': 0.88,
-                'description': 'Frames information as suppressed or hidden by authorities'
-            },
-            'miracle_solutions': {
-                'name': 'Miracle Solution',
-                'indicators': ['instant cure', 'overnight success', 'secret method', 'guaranteed results'],
-                'weight': 0.75,
-                'description': 'Promises unrealistic, simple solutions to complex problems'
-            },
-            'credibility_signaling': {
-                'name': 'Credibility Signaling',
-                'indicators': ['scientifically proven', 'doctor approved', 'official report', 'verified'],
-                'weight': 0.68,
-                'description': 'Uses credibility markers without actual verification'
-            },
-            'social_proof': {
-                'name': 'Artificial Social Proof',
-                'indicators': ['everyone is talking', 'viral', 'trending', 'millions agree'],
-                'weight': 0.70,
-                'description': 'Creates illusion of widespread acceptance'
-            }
-        }
-        
-        # Authenticity patterns
-        self.authenticity_patterns = {
-            'source_transparency': {
-                'name': 'Source Transparency',
-                'indicators': ['according to [specific source]', 'researchers at [institution]', 'study published in'],
-                'weight': 0.82,
-                'description': 'Clearly identifies specific, verifiable sources'
-            },
-            'data_specificity': {
-                'name': 'Data Specificity',
-                'indicators': ['data shows', 'statistics indicate', 'research conducted', 'analysis of'],
-                'weight': 0.79,
-                'description': 'Provides specific data and statistics'
-            },
-            'context_provision': {
-                'name': 'Context Provision',
-                'indicators': ['however', 'although', 'in contrast', 'it is important to note'],
-                'weight': 0.76,
-                'description': 'Provides balanced context and limitations'
-            },
-            'methodology_disclosure': {
-                'name': 'Methodology Disclosure',
-                'indicators': ['methodology', 'study design', 'sample size', 'limitations'],
-                'weight': 0.85,
-                'description': 'Explains how information was gathered or verified'
-            },
-            'expert_attribution': {
-                'name': 'Expert Attribution',
-                'indicators': ['expert in', 'professor of', 'researcher specializing in', 'according to Dr.'],
-                'weight': 0.80,
-                'description': 'Attributes information to specific, qualified experts'
-            }
-        }
-    
-    def analyze_patterns(self, text):
-        """Analyze text for disinformation patterns"""
-        text_lower = text.lower()
-        words = text.split()
-        word_count = len(words)
-        
-        results = {
-            'patterns_detected': {},
-            'pattern_scores': {},
-            'overall_risk_score': 0,
-            'authenticity_score': 0,
-            'pattern_count': 0,
-            'text_metrics': {},
-            'timeline_analysis': []
-        }
-        
-        # Calculate text metrics
-        results['text_metrics'] = {
-            'word_count': word_count,
-            'sentence_count': len(re.split(r'[.!?]+', text)),
-            'avg_word_length': np.mean([len(w) for w in words]) if words else 0,
-            'exclamation_density': text.count('!') / max(1, word_count) * 1000,
-            'question_density': text.count('?') / max(1, word_count) * 1000,
-            'all_caps_count': len(re.findall(r'\b[A-Z]{3,}\b', text)),
-            'number_count': len(re.findall(r'\b\d+\b', text))
-        }
-        
-        # Detect disinformation patterns
-        pattern_scores = {}
-        for pattern_id, pattern in self.patterns.items():
-            score = 0
-            indicators_found = []
-            
-            for indicator in pattern['indicators']:
-                if isinstance(indicator, str):
-                    if indicator.lower() in text_lower:
-                        count = text_lower.count(indicator.lower())
-                        score += count * pattern['weight']
-                        indicators_found.append(indicator)
-            
-            # Check for pattern combinations
-            if len(indicators_found) >= 2:
-                score *= 1.3  # Boost for multiple indicators
-            
-            if score > 0:
-                pattern_scores[pattern_id] = {
-                    'score': min(1.0, score),
-                    'name': pattern['name'],
-                    'description': pattern['description'],
-                    'indicators_found': indicators_found,
-                    'confidence': min(0.95, score * 0.8 + 0.2)
-                }
-        
-        # Detect authenticity patterns
-        authenticity_scores = {}
-        for pattern_id, pattern in self.authenticity_patterns.items():
-            score = 0
-            
-            for indicator in pattern['indicators']:
-                if indicator.lower() in text_lower:
-                    count = text_lower.count(indicator.lower())
-                    score += count * pattern['weight']
-            
-            if score > 0:
-                authenticity_scores[pattern_id] = {
-                    'score': min(1.0, score),
-                    'name': pattern['name'],
-                    'description': pattern['description']
-                }
-        
-        # Calculate overall scores
-        if pattern_scores:
-            avg_pattern_score = np.mean([p['score'] for p in pattern_scores.values()])
-            max_pattern_score = max([p['score'] for p in pattern_scores.values()])
-            results['overall_risk_score'] = min(1.0, (avg_pattern_score * 0.6 + max_pattern_score * 0.4))
-        else:
-            results['overall_risk_score'] = 0.1  # Low baseline risk
-        
-        if authenticity_scores:
-            results['authenticity_score'] = min(1.0, np.mean([p['score'] for p in authenticity_scores.values()]))
-        else:
-            results['authenticity_score'] = 0.1  # Low baseline authenticity
-        
-        # Balance the scores (authenticity reduces risk)
-        adjusted_risk = results['overall_risk_score'] * (1 - results['authenticity_score'] * 0.5)
-        results['overall_risk_score'] = min(1.0, adjusted_risk)
-        
-        results['patterns_detected'] = pattern_scores
-        results['authenticity_patterns'] = authenticity_scores
-        results['pattern_count'] = len(pattern_scores)
-        
-        # Generate timeline analysis
-        sentences = re.split(r'[.!?]+', text)
-        for i, sentence in enumerate(sentences[:5]):  # Analyze first 5 sentences
-            if len(sentence.strip()) > 10:
-                sentence_risk = 0
-                detected_patterns = []
-                
-                for pattern_id, pattern in self.patterns.items():
-                    for indicator in pattern['indicators']:
-                        if isinstance(indicator, str) and indicator.lower() in sentence.lower():
-                            sentence_risk += pattern['weight']
-                            detected_patterns.append(pattern['name'])
-                            break
-                
-                if detected_patterns:
-                    results['timeline_analysis'].append({
-                        'sentence': sentence.strip(),
-                        'risk': min(1.0, sentence_risk),
-                        'patterns': list(set(detected_patterns))[:2]
-                    })
-        
-        return results
+# Built once per process and shared read-only by every browser session
+@st.cache_resource
+def load_analyzer():
+    return PatternRecognitionEngine(os.environ.get('PATTERN_REGISTRY'))
+
+@st.cache_resource
+def load_pipeline_metrics():
+    # PATTERN_METRICS picks the sink: memory, prometheus or log:PATH
+    return configure_metrics(os.environ.get('PATTERN_METRICS'))
+
+@st.cache_resource
+def load_analysis_cache():
+    return AnalysisCache(load_analyzer(), db_path=os.environ.get('PATTERN_CACHE_DB'))
+
+@st.cache_resource
+def load_analysis_store():
+    return AnalysisStore(os.environ.get('PATTERN_STORE_DB', 'analysis_store.db'))
+
+@st.cache_resource
+def load_pattern_db():
+    return create_pattern_database()
+
+@st.cache_resource
+def load_export_dir():
+    # Swept once when the process starts, then before every new export
+    sweep_export_dir()
+    return EXPORT_DIR
+
+def sweep_export_dir():
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    cutoff = time.time() - EXPORT_MAX_AGE_SECONDS
+    for entry in os.scandir(EXPORT_DIR):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass  # Already removed by another session
+
+def prepare_stored_export(export_format, **filters):
+    # Encoded page by page into the export directory, only when asked for
+    sweep_export_dir()
+    pages = load_analysis_store().iter_pages(**filters, page_size=EXPORT_CHUNK_ROWS)
+    with tempfile.NamedTemporaryFile(prefix="stored_analyses_", suffix=f".{export_format}", dir=EXPORT_DIR,
+                                     delete=False) as file:
+        for chunk in iter_export(store_frames(pages), export_format):
+            file.write(chunk)
+    return file.name
+
+def discard_stored_export():
+    prepared = st.session_state.pop('stored_export', None)
+    if prepared and os.path.exists(prepared['path']):
+        os.remove(prepared['path'])
 
 # -------------------------------
-# PATTERN DATABASE
+# BATCHED HTML RENDERING
 # -------------------------------
-def create_pattern_database():
-    """Create database of information patterns for analysis"""
-    
-    case_studies = [
-        {
-            'title': 'Emotional Amplification Case',
-            'text': 'SHOCKING BREAKING NEWS!!! The government is HIDING the REAL truth about this AMAZING discovery! Doctors are DEVASTATED by what they found! This will CHANGE everything FOREVER!!!',
-            'patterns': ['emotional_amplification', 'urgency_creation', 'conspiracy_framing'],
-            'risk_level': 'High',
-            'analysis_focus': 'Emotional manipulation through excessive punctuation and capitalization'
-        },
-        {
-            'title': 'Source Obfuscation Example',
-            'text': 'Experts say that this new discovery will revolutionize everything. Studies show amazing results that they don\'t want you to know about. Many people are already seeing incredible benefits.',
-            'patterns': ['source_obfuscation', 'miracle_solutions', 'social_proof'],
-            'risk_level': 'Medium',
-            'analysis_focus': 'Vague sourcing and unverified claims'
-        },
-        {
-            'title': 'Balanced Scientific Report',
-            'text': 'According to a study published in the Journal of Medical Research, researchers found a 15% improvement in outcomes. However, the study authors note limitations including sample size constraints and recommend further research to confirm findings.',
-            'patterns': ['source_transparency', 'methodology_disclosure', 'context_provision'],
-            'risk_level': 'Low',
-            'analysis_focus': 'Clear sourcing and balanced presentation'
-        },
-        {
-            'title': 'Binary Narrative Example',
-            'text': 'This solution works 100% of the time for EVERYONE. There are NO side effects and it is COMPLETELY safe. The mainstream media NEVER reports on this because they want to keep you in the dark.',
-            'patterns': ['binary_narrative', 'conspiracy_framing', 'miracle_solutions'],
-            'risk_level': 'High',
-            'analysis_focus': 'Absolute claims combined with conspiracy framing'
-        },
-        {
-            'title': 'Data-Driven Analysis',
-            'text': 'Analysis of data from the National Statistics Office shows a 3.2% economic growth. The methodology involved surveying 5,000 households across 50 regions. While positive, economists caution that seasonal factors may have influenced results.',
-            'patterns': ['data_specificity', 'methodology_disclosure', 'context_provision'],
-            'risk_level': 'Low',
-            'analysis_focus': 'Specific data with methodological transparency'
-        }
-    ]
-    
-    pattern_definitions = [
-        {
-            'name': 'Emotional Amplification',
-            'description': 'Uses excessive emotional language, punctuation, and capitalization to trigger emotional responses and bypass critical thinking.',
-            'examples': ['"SHOCKING revelation!"', '"DEVASTATING consequences!"', 'Multiple exclamation marks (!!!)'],
-            'detection_tip': 'Look for clusters of emotional adjectives and excessive punctuation.'
-        },
-        {
-            'name': 'False Urgency',
-            'description': 'Creates artificial time pressure to encourage quick sharing without verification.',
-            'examples': ['"BREAKING: Act NOW!"', '"Limited time offer!"', '"Share before deleted!"'],
-            'detection_tip': 'Check for time-sensitive language without actual time constraints.'
-        },
-        {
-            'name': 'Source Obfuscation',
-            'description': 'Uses vague references to authority ("experts say", "studies show") without specific citations.',
-            'examples': ['"Scientists confirm..."', '"Research indicates..."', '"They don\'t want you to know..."'],
-            'detection_tip': 'Ask "Which experts?" or "Which study?" to test specificity.'
-        },
-        {
-            'name': 'Binary Narrative',
-            'description': 'Presents complex issues as simple good/bad dichotomies with absolute language.',
-            'examples': ['"100% effective"', '"Everyone agrees"', '"Complete solution"'],
-            'detection_tip': 'Watch for absolutes (always, never, everyone, no one).'
-        }
-    ]
-    
-    return {
-        'case_studies': case_studies,
-        'pattern_definitions': pattern_definitions
-    }
+# Every st.markdown call is a separate delta to the browser, so a section
+# builds its HTML first and draws it with one call
+def render_html(blocks, panel_style=None):
+    # Dedented and stripped, so no blank line ends the HTML block early
+    body = "\n".join(textwrap.dedent(block).strip() for block in blocks)
+    if panel_style:
+        body = f'<div class="scroll-panel" style="{panel_style}">\n{body}\n</div>'
+    st.markdown(body, unsafe_allow_html=True)
+
+def risk_bar_html(label, count, total, color):
+    percentage = (count / total) * 100
+    return f"""
+    <div style="margin: 0.5rem 0;">
+        <div style="display: flex; justify-content: space-between;">
+            <span style="font-weight: 600;">{label}</span>
+            <span>{count} ({percentage:.1f}%)</span>
+        </div>
+        <div style="height: 8px; background: #E5E7EB; border-radius: 4px; margin-top: 0.2rem;">
+            <div style="height: 100%; width: {percentage}%; background: {color}; border-radius: 4px;"></div>
+        </div>
+    </div>
+    """
+
+analysis_cache = load_analysis_cache()
+analysis_store = load_analysis_store()
+pattern_db = load_pattern_db()
+load_export_dir()
+
+# Pick up registry edits on the next rerun; a broken registry keeps the
+# current patterns and is reported in the sidebar
+analyzer = load_analyzer()
+analyzer.reload_if_changed()
+
+pipeline_metrics = load_pipeline_metrics()
 
 # -------------------------------
 # INITIALIZE SESSION STATE
 # -------------------------------
-if 'analyzer' not in st.session_state:
-    st.session_state.analyzer = PatternRecognitionEngine()
-
 if 'analysis_history' not in st.session_state:
-    st.session_state.analysis_history = []
+    st.session_state.analysis_history = AnalysisHistory(load_analyzer().patterns, capacity=HISTORY_CAPACITY)
+
+history = st.session_state.analysis_history
 
-if 'pattern_db' not in st.session_state:
-    st.session_state.pattern_db = create_pattern_database()
+# Per-session match state so edit-and-rerun only rescans changed sentences
+if 'incremental_analyzer' not in st.session_state:
+    st.session_state.incremental_analyzer = IncrementalAnalyzer(load_analyzer())
 
 # -------------------------------
 # SIDEBAR - PATTERN LIBRARY
@@ -525,7 +354,7 @@ with st.sidebar:
     # Pattern Library
     st.markdown("### 📚 Pattern Library")
     
-    for pattern in st.session_state.pattern_db['pattern_definitions']:
+    for pattern in pattern_db['pattern_definitions']:
         with st.expander(f"🔎 {pattern['name']}"):
             st.markdown(f"**Description**: {pattern['description']}")
             st.markdown("**Examples**:")
@@ -541,14 +370,14 @@ with st.sidebar:
     col1, col2 = st.columns(2)
     with col1:
         if st.button("🔬 Analyze Case", use_container_width=True):
-            case = random.choice(st.session_state.pattern_db['case_studies'])
+            case = random.choice(pattern_db['case_studies'])
             st.session_state.analysis_text = case['text']
             st.session_state.case_title = case['title']
             st.rerun()
     
     with col2:
         if st.button("🔄 Random Text", use_container_width=True):
-            all_texts = [c['text'] for c in st.session_state.pattern_db['case_studies']]
+            all_texts = [c['text'] for c in pattern_db['case_studies']]
             st.session_state.analysis_text = random.choice(all_texts)
             st.session_state.case_title = "Random Sample"
             st.rerun()
@@ -558,11 +387,9 @@ with st.sidebar:
     # Analysis Dashboard
     st.markdown("### 📊 Analysis Dashboard")
     
-    if st.session_state.analysis_history:
-        total_analyses = len(st.session_state.analysis_history)
-        high_risk = sum(1 for h in st.session_state.analysis_history 
-                       if h['overall_risk'] > 0.7)
-        avg_risk = np.mean([h['overall_risk'] for h in st.session_state.analysis_history]) if st.session_state.analysis_history else 0
+    if len(history):
+        total_analyses = len(history)
+        high_risk = history.high_risk_count()
         
         col1, col2 = st.columns(2)
         with col1:
@@ -571,12 +398,9 @@ with st.sidebar:
             st.metric("High Risk Cases", high_risk)
         
         # Risk distribution - SIMPLE VERSION WITHOUT PLOTLY
-        risk_levels = ['Low', 'Medium', 'High']
-        risk_counts = [
-            sum(1 for h in st.session_state.analysis_history if h['overall_risk'] < 0.4),
-            sum(1 for h in st.session_state.analysis_history if 0.4 <= h['overall_risk'] <= 0.7),
-            sum(1 for h in st.session_state.analysis_history if h['overall_risk'] > 0.7)
-        ]
+        band_counts = history.risk_band_counts()
+        risk_levels = list(band_counts)
+        risk_counts = list(band_counts.values())
         
         # Display risk distribution as progress bars
         st.markdown("**Risk Distribution:**")
@@ -584,34 +408,20 @@ with st.sidebar:
         colors = ['#10B981', '#F59E0B', '#DC2626']
         total = sum(risk_counts)
         
-        for level, count, color in zip(risk_levels, risk_counts, colors):
-            if total > 0:
-                percentage = (count / total) * 100
-                st.markdown(f"""
-                <div style="margin: 0.5rem 0;">
-                    <div style="display: flex; justify-content: space-between;">
-                        <span style="font-weight: 600;">{level}</span>
-                        <span>{count} ({percentage:.1f}%)</span>
-                    </div>
-                    <div style="height: 8px; background: #E5E7EB; border-radius: 4px; margin-top: 0.2rem;">
-                        <div style="height: 100%; width: {percentage}%; background: {color}; border-radius: 4px;"></div>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
+        if total > 0:
+            render_html([
+                risk_bar_html(level, count, total, color)
+                for level, count, color in zip(risk_levels, risk_counts, colors)
+            ])
         
         # Most common patterns
         if total_analyses > 0:
-            all_patterns = []
-            for h in st.session_state.analysis_history:
-                all_patterns.extend(h['patterns_detected'])
+            common_patterns = history.pattern_frequency(top=3)
             
-            if all_patterns:
-                pattern_counts = Counter(all_patterns)
-                common_patterns = pattern_counts.most_common(3)
-                
-                st.markdown("**Most Common Patterns:**")
-                for pattern, count in common_patterns:
-                    st.markdown(f"• {pattern}: {count} times")
+            if common_patterns:
+                st.markdown("**Most Common Patterns:**\n" + "\n".join(
+                    f"- {pattern}: {count} times" for pattern, count in common_patterns
+                ))
     
     else:
         st.info("No analyses yet. Start by analyzing text above!")
@@ -621,14 +431,20 @@ with st.sidebar:
     # System Information
     st.markdown("### ℹ️ System Info")
     st.caption("**Version**: 2.1 Pattern Recognition")
-    st.caption("**Patterns**: 8 disinformation + 5 authenticity")
+    st.caption(f"**Patterns**: {len(analyzer.patterns)} disinformation + "
+               f"{len(analyzer.authenticity_patterns)} authenticity (registry v{analyzer.version})")
+    if analyzer.reload_error:
+        st.warning(f"Pattern registry not reloaded:\n\n{analyzer.reload_error}")
     st.caption("**Algorithm**: Weighted pattern matching")
+    cache_stats = analysis_cache.stats()
+    st.caption(f"**Cache**: {cache_stats['hits'] + cache_stats['disk_hits']} hits / {cache_stats['misses']} misses")
     
     st.markdown("---")
     
     # Clear button
     if st.button("🗑️ Clear History", use_container_width=True, type="secondary"):
-        st.session_state.analysis_history = []
+        history.clear()
+        st.session_state.pop('history_export', None)
         st.rerun()
 
 # -------------------------------
@@ -672,27 +488,38 @@ with tab1:
         st.rerun()
     
     if sample_btn:
-        sample = random.choice(st.session_state.pattern_db['case_studies'])
+        sample = random.choice(pattern_db['case_studies'])
         st.session_state.analysis_text = sample['text']
         st.session_state.case_title = sample['title']
         st.rerun()
     
     if analyze_btn and input_text.strip():
         with st.spinner("🔬 Analyzing patterns..."):
-            # Progress animation
-            progress_bar = st.progress(0)
-            for i in range(100):
-                time.sleep(0.005)
-                progress_bar.progress(i + 1)
+            # Stage progress from the engine, only worth drawing for long inputs
+            progress_bar = st.progress(0) if len(input_text) > LONG_INPUT_CHARS else None
+            
+            def report_progress(stage, fraction):
+                progress_bar.progress(fraction, text=f"Stage: {stage}")
             
             # Perform analysis
-            results = st.session_state.analyzer.analyze_patterns(input_text)
+            started = time.perf_counter()
+            results = analysis_cache.analyze(
+                input_text,
+                progress=report_progress if progress_bar else None,
+                compute=st.session_state.incremental_analyzer.analyze
+            )
+            analysis_ms = (time.perf_counter() - started) * 1000
             
             # Clear progress
-            progress_bar.empty()
+            if progress_bar:
+                progress_bar.empty()
+            
+            # Time each results section as it is drawn
+            render = pipeline_metrics.stage_clock('render', tab='pattern_analysis')
             
             # Display Risk Assessment
             st.markdown("### 📊 Risk Assessment")
+            st.caption(f"⏱️ Analysis latency: {analysis_ms:.1f} ms")
             
             risk_score = results['overall_risk_score']
             authenticity_score = results['authenticity_score']
@@ -779,10 +606,13 @@ with tab1:
             </div>
             ''', unsafe_allow_html=True)
             
+            render('risk_assessment')
+            
             # Detected Patterns
             st.markdown("### 🔎 Detected Patterns")
             
             if results['patterns_detected']:
+                cards = []
                 for pattern_id, pattern_data in results['patterns_detected'].items():
                     pattern_score = pattern_data['score']
                     
@@ -793,13 +623,14 @@ with tab1:
                     else:
                         pattern_class = "pattern-low"
                     
-                    st.markdown(f'''
+                    # Names, descriptions and indicators come from the editable registry
+                    cards.append(f'''
                     <div class="pattern-card {pattern_class}">
                         <div style="display: flex; justify-content: space-between; align-items: start;">
                             <div>
-                                <h4 style="margin: 0; color: #1F2937;">{pattern_data['name']}</h4>
+                                <h4 style="margin: 0; color: #1F2937;">{html.escape(pattern_data['name'])}</h4>
                                 <p style="margin: 0.5rem 0; color: #6B7280; font-size: 0.9rem;">
-                                    {pattern_data['description']}
+                                    {html.escape(pattern_data['description'])}
                                 </p>
                             </div>
                             <div style="text-align: right;">
@@ -816,7 +647,7 @@ with tab1:
                                 Indicators Found:
                             </div>
                             <div style="display: flex; flex-wrap: wrap; gap: 0.5rem; margin-top: 0.3rem;">
-                                {''.join([f'<span class="metric-badge risk-high">{ind}</span>' for ind in pattern_data['indicators_found'][:3]])}
+                                {''.join([f'<span class="metric-badge risk-high">{html.escape(ind)}</span>' for ind in pattern_data['indicators_found'][:3]])}
                             </div>
                         </div>
                         <div style="margin-top: 0.5rem;">
@@ -825,62 +656,70 @@ with tab1:
                             </div>
                         </div>
                     </div>
-                    ''', unsafe_allow_html=True)
+                    ''')
+                render_html(cards, panel_style=f"max-height: {CARD_PANEL_MAX_HEIGHT}px;")
             else:
                 st.markdown('<div class="pattern-card pattern-neutral"><div style="text-align: center; padding: 1rem;"><h4 style="color: #6B7280;">✅ No Strong Disinformation Patterns Detected</h4><p style="color: #9CA3AF;">The text shows minimal indicators of common disinformation patterns.</p></div></div>', unsafe_allow_html=True)
             
+            render('pattern_cards')
+            
             # Authenticity Patterns
             if results['authenticity_patterns']:
                 st.markdown("### ✅ Authenticity Indicators")
                 
-                for pattern_id, pattern_data in results['authenticity_patterns'].items():
-                    st.markdown(f'''
+                render_html([
+                    f'''
                     <div class="pattern-indicator">
                         <div class="indicator-dot" style="background: #10B981;"></div>
                         <div style="flex: 1;">
-                            <strong>{pattern_data['name']}</strong>
+                            <strong>{html.escape(pattern_data['name'])}</strong>
                             <div style="font-size: 0.85rem; color: #6B7280;">
-                                {pattern_data['description']}
+                                {html.escape(pattern_data['description'])}
                             </div>
                         </div>
                         <div style="font-weight: 600; color: #059669;">
                             +{pattern_data['score']:.0%}
                         </div>
                     </div>
-                    ''', unsafe_allow_html=True)
+                    '''
+                    for pattern_data in results['authenticity_patterns'].values()
+                ], panel_style=f"max-height: {CARD_PANEL_MAX_HEIGHT}px;")
+            
+            render('authenticity')
             
             # Timeline Analysis
             if results['timeline_analysis']:
                 st.markdown("### ⏳ Text Timeline Analysis")
-                st.markdown('<div class="pattern-timeline">', unsafe_allow_html=True)
                 
-                for i, item in enumerate(results['timeline_analysis']):
-                    risk_color = "#DC2626" if item['risk'] > 0.7 else "#F59E0B" if item['risk'] > 0.4 else "#10B981"
-                    
-                    st.markdown(f'''
-                    <div class="timeline-item" style="background: {risk_color}10;">
-                        <div class="timeline-dot" style="background: {risk_color};"></div>
-                        <div style="flex: 1;">
-                            <div style="font-weight: 600; margin-bottom: 0.2rem;">
-                                Sentence {i+1} • Risk: <span style="color: {risk_color};">{item['risk']:.0%}</span>
-                            </div>
-                            <div style="font-size: 0.9rem; color: #4B5563; font-style: italic;">
-                                "{item['sentence']}..."
-                            </div>
-                            <div style="font-size: 0.8rem; color: #6B7280; margin-top: 0.2rem;">
-                                <strong>Patterns:</strong> {', '.join(item['patterns'])}
-                            </div>
-                        </div>
-                    </div>
-                    ''', unsafe_allow_html=True)
+                # One chart for every sentence instead of a card per sentence
+                if len(results['sentence_risk']) > 1:
+                    st.bar_chart(np.asarray(results['sentence_risk']), height=160)
                 
-                st.markdown('</div>', unsafe_allow_html=True)
+                # Flagged sentences in a scrolling table; the browser only
+                # draws the rows in view, however many sentences were flagged
+                flagged = pd.DataFrame(results['timeline_analysis'])
+                st.dataframe(
+                    pd.DataFrame({
+                        'Sentence': flagged['index'] + 1,
+                        'Risk': flagged['risk'] * 100,
+                        'Patterns': flagged['patterns'].str.join(", "),
+                        'Text': flagged['sentence']
+                    }),
+                    column_config={
+                        'Risk': st.column_config.ProgressColumn("Risk", min_value=0, max_value=100, format="%.0f%%"),
+                        'Text': st.column_config.TextColumn("Text", width="large")
+                    },
+                    height=min(len(flagged), TIMELINE_VISIBLE_ROWS) * 35 + 38,
+                    use_container_width=True, hide_index=True
+                )
+                st.caption(f"{len(flagged)} flagged sentences")
+            
+            render('timeline')
             
             # Text Metrics
             st.markdown("### 📈 Text Metrics")
 
             metrics = results['text_metrics']
-            cols = st.columns(4)
 
             metric_config = [
                 ("Word Count", metrics['word_count'], "#3B82F6", "📊"),
@@ -889,36 +728,37 @@ with tab1:
                 ("Numbers", metrics['number_count'], "#10B981", "🔢")
             ]
 
-            for idx, (label, value, color, icon) in enumerate(metric_config):
-                with cols[idx]:
-                    st.markdown(f'''
-                    <div class="grid-item">
-                        <div style="font-size: 1.2rem; margin-bottom: 0.5rem;">
-                            {icon}
-                        </div>
-                        <div style="font-size: 1.8rem; font-weight: 800; color: {color};">
-                            {value}
-                        </div>
-                        <div style="font-size: 0.9rem; color: #6B7280; margin-top: 0.2rem;">
-                            {label}
-                        </div>
+            render_html(['<div class="pattern-grid">'] + [
+                f'''
+                <div class="grid-item">
+                    <div style="font-size: 1.2rem; margin-bottom: 0.5rem;">
+                        {icon}
                     </div>
-                    ''', unsafe_allow_html=True)
-            
-            # Save to history
-            history_entry = {
-                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                'text_preview': input_text[:80] + "..." if len(input_text) > 80 else input_text,
-                'overall_risk': risk_score,
-                'pattern_count': results['pattern_count'],
-                'patterns_detected': list(results['patterns_detected'].keys()),
-                'word_count': metrics['word_count']
-            }
+                    <div style="font-size: 1.8rem; font-weight: 800; color: {color};">
+                        {value}
+                    </div>
+                    <div style="font-size: 0.9rem; color: #6B7280; margin-top: 0.2rem;">
+                        {label}
+                    </div>
+                </div>
+                '''
+                for label, value, color, icon in metric_config
+            ] + ['</div>'])
+            render('text_metrics')
+            render.done()
             
-            st.session_state.analysis_history.append(history_entry)
+            # Save to history and the persistent store
+            text_preview = input_text[:80] + "..." if len(input_text) > 80 else input_text
+            history.append(
+                overall_risk=risk_score,
+                patterns_detected=list(results['patterns_detected'].keys()),
+                word_count=metrics['word_count'],
+                text_preview=text_preview
+            )
+            analysis_store.add(results, text_preview, fingerprint=load_analyzer().fingerprint)
             
             # Success message
-            st.success(f"✅ Analysis complete! Detected {results['pattern_count']} disinformation patterns with {risk_score:.1%} overall risk.")
+            st.success(f"✅ Analysis complete! Detected {results['pattern_count']} disinformation patterns with {risk_score:.1%} overall risk in {analysis_ms:.1f} ms.")
             
             # Clear case title
             if 'case_title' in st.session_state:
@@ -931,7 +771,7 @@ with tab2:
     st.markdown("### 📚 Case Studies Library")
     st.caption("Study real examples of different information patterns")
     
-    for i, case in enumerate(st.session_state.pattern_db['case_studies']):
+    for i, case in enumerate(pattern_db['case_studies']):
         risk_color = "#DC2626" if case['risk_level'] == 'High' else "#F59E0B" if case['risk_level'] == 'Medium' else "#10B981"
         
         st.markdown(f'''
@@ -990,89 +830,66 @@ with tab2:
 with tab3:
     st.markdown("### 📈 System Dashboard")
     
-    if not st.session_state.analysis_history:
+    if not len(history):
         st.info("No analysis data available. Start analyzing texts to see statistics.")
     else:
-        # Convert history to DataFrame for analysis
-        df = pd.DataFrame(st.session_state.analysis_history)
-        
-        # Overall Statistics
+        # Overall Statistics (running aggregates, no pass over the history)
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("Total Analyses", len(df))
+            st.metric("Total Analyses", len(history))
         with col2:
-            avg_risk = df['overall_risk'].mean()
-            st.metric("Average Risk", f"{avg_risk:.1%}")
+            st.metric("Average Risk", f"{history.mean_risk():.1%}")
         with col3:
-            max_risk = df['overall_risk'].max()
-            st.metric("Highest Risk", f"{max_risk:.1%}")
+            st.metric("Highest Risk", f"{history.max_risk():.1%}")
         with col4:
-            avg_patterns = df['pattern_count'].mean()
-            st.metric("Avg Patterns", f"{avg_patterns:.1f}")
+            st.metric("Avg Patterns", f"{history.mean_pattern_count():.1f}")
         
         # Risk Distribution Chart - SIMPLE VERSION
         st.markdown("#### 📊 Risk Score Distribution")
         
-        # Create bins for risk scores
-        bins = [0, 0.2, 0.4, 0.6, 0.8, 1.0]
-        labels = ['0-20%', '21-40%', '41-60%', '61-80%', '81-100%']
+        # Bin counts are maintained as analyses are added and evicted
+        bin_counts = history.risk_bin_counts()
+        labels = list(bin_counts)
+        bin_counts = list(bin_counts.values())
         colors = ['#10B981', '#34D399', '#F59E0B', '#F97316', '#DC2626']
         
-        df['risk_bin'] = pd.cut(df['overall_risk'], bins=bins, labels=labels)
-        bin_counts = df['risk_bin'].value_counts().reindex(labels, fill_value=0)
-        
         # Display as progress bars
-        total_analyses = len(df)
+        total_analyses = len(history)
         
-        for label, count, color in zip(labels, bin_counts, colors):
-            if total_analyses > 0:
-                percentage = (count / total_analyses) * 100
-                st.markdown(f"""
-                <div style="margin: 0.5rem 0;">
-                    <div style="display: flex; justify-content: space-between;">
-                        <span style="font-weight: 600;">{label}</span>
-                        <span>{count} ({percentage:.1f}%)</span>
-                    </div>
-                    <div style="height: 8px; background: #E5E7EB; border-radius: 4px; margin-top: 0.2rem;">
-                        <div style="height: 100%; width: {percentage}%; background: {color}; border-radius: 4px;"></div>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
+        render_html([
+            risk_bar_html(label, count, total_analyses, color)
+            for label, count, color in zip(labels, bin_counts, colors)
+        ])
         
         # Pattern Frequency - SIMPLE TABLE VERSION
         st.markdown("#### 🔍 Pattern Frequency")
         
-        # Flatten pattern lists
-        all_patterns = []
-        for patterns in df['patterns_detected']:
-            all_patterns.extend(patterns)
+        pattern_counts = history.pattern_frequency()
         
-        if all_patterns:
-            pattern_counts = Counter(all_patterns)
-            pattern_df = pd.DataFrame(
-                pattern_counts.items(),
-                columns=['Pattern', 'Count']
-            ).sort_values('Count', ascending=False).head(10)
+        if pattern_counts:
+            pattern_df = pd.DataFrame(pattern_counts, columns=['Pattern', 'Count']).head(10)
             
-            # Display as table
-            st.markdown('<table class="data-table">', unsafe_allow_html=True)
-            st.markdown('<tr><th>Pattern</th><th>Detection Count</th><th>Frequency</th></tr>', unsafe_allow_html=True)
+            # Display as table, built whole so the rows land inside it
+            total_patterns = sum(count for _, count in pattern_counts)
+            table_rows = []
+            for pattern, count in pattern_df.itertuples(index=False):
+                frequency = (count / total_patterns) * 100 if total_patterns > 0 else 0
+                table_rows.append(f'<tr><td>{pattern.replace("_", " ").title()}</td><td>{count}</td><td>{frequency:.1f}%</td></tr>')
             
-            total_patterns = sum(pattern_counts.values())
-            for _, row in pattern_df.iterrows():
-                frequency = (row['Count'] / total_patterns) * 100 if total_patterns > 0 else 0
-                st.markdown(f'<tr><td>{row["Pattern"].replace("_", " ").title()}</td><td>{row["Count"]}</td><td>{frequency:.1f}%</td></tr>', unsafe_allow_html=True)
-            
-            st.markdown('</table>', unsafe_allow_html=True)
+            render_html(['<table class="data-table">',
+                         '<tr><th>Pattern</th><th>Detection Count</th><th>Frequency</th></tr>',
+                         *table_rows, '</table>'])
         
         # Recent Analyses
         st.markdown("#### 📝 Recent Analyses")
         
-        for entry in st.session_state.analysis_history[-5:]:
+        recent_cards = []
+        for entry in history.recent(5):
             risk_color = "#DC2626" if entry['overall_risk'] > 0.7 else "#F59E0B" if entry['overall_risk'] > 0.4 else "#10B981"
             
-            st.markdown(f'''
+            # Previews are user text; escaped so one cannot break the batch's markup
+            recent_cards.append(f'''
             <div style="padding: 1rem; border-radius: 8px; background: white; border: 1px solid #E5E7EB; margin: 0.5rem 0;">
                 <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 0.5rem;">
                     <div style="font-weight: 600; color: #1F2937;">
@@ -1083,27 +900,136 @@ with tab3:
                     </div>
                 </div>
                 <div style="color: #6B7280; font-size: 0.9rem; margin-bottom: 0.5rem;">
-                    {entry['text_preview']}
+                    {html.escape(entry['text_preview'])}
                 </div>
                 <div style="display: flex; justify-content: space-between; font-size: 0.85rem; color: #9CA3AF;">
                     <span>📊 {entry['word_count']} words</span>
                     <span>🔍 {entry['pattern_count']} patterns</span>
                 </div>
             </div>
-            ''', unsafe_allow_html=True)
+            ''')
+        render_html(recent_cards)
         
-        # Export Data
+        # Export Data (encoded only on request and kept until the format changes)
         st.markdown("---")
         st.markdown("#### 📥 Export Data")
         
-        if st.button("Export Analysis Data as CSV", use_container_width=True):
-            csv = df.to_csv(index=False)
+        export_format = st.radio("Format", export_formats(), horizontal=True, key="history_export_format",
+                                 format_func=str.upper)
+        prepared_history = st.session_state.get('history_export')
+        if prepared_history and prepared_history['format'] != export_format:
+            prepared_history = None
+        
+        if st.button(f"Prepare {len(history)} Analyses for Export", use_container_width=True,
+                     key="history_prepare_export"):
+            prepared_history = {'format': export_format, 'total': len(history),
+                                'data': b"".join(iter_export(history.iter_frames(EXPORT_CHUNK_ROWS), export_format))}
+            st.session_state.history_export = prepared_history
+        
+        if prepared_history:
             st.download_button(
-                label="Download CSV",
-                data=csv,
-                file_name="pattern_analysis_data.csv",
-                mime="text/csv"
+                label=f"Download Analysis Data as {export_format.upper()}",
+                data=prepared_history['data'],
+                file_name=f"pattern_analysis_data.{export_format}",
+                mime=EXPORT_MIME_TYPES[export_format],
+                use_container_width=True
             )
+            st.caption(f"Prepared with {prepared_history['total']} analyses; prepare again to include newer ones.")
+    
+    # Stored Analyses (persisted across sessions, queried one page at a time)
+    st.markdown("---")
+    st.markdown("#### 🗄️ Stored Analyses")
+    
+    filter_col1, filter_col2, filter_col3 = st.columns(3)
+    with filter_col1:
+        band_filter = st.selectbox("Risk band", ["Any"] + list(RISK_BANDS), key="store_band")
+    with filter_col2:
+        pattern_filter = st.selectbox("Pattern", ["Any"] + list(load_analyzer().patterns), key="store_pattern",
+                                      format_func=lambda p: p if p == "Any" else p.replace("_", " ").title())
+    with filter_col3:
+        window_filter = st.selectbox("Time window", ["All time", "Last 24 hours", "Last 7 days"], key="store_window")
+    
+    window_seconds = {"Last 24 hours": 86400, "Last 7 days": 7 * 86400}.get(window_filter)
+    # Window start rounded to the minute so reruns keep the page and prepared export
+    store_filters = dict(
+        risk_band=None if band_filter == "Any" else band_filter,
+        pattern_id=None if pattern_filter == "Any" else pattern_filter,
+        since=int(time.time() - window_seconds) // 60 * 60 if window_seconds else None
+    )
+    stored_total = analysis_store.count(**store_filters)
+    
+    # Each page starts after the last row of the one before it, so deep pages
+    # seek through the index instead of skipping rows; the cursor stack
+    # starts over whenever the filters change
+    if st.session_state.get('store_filter_key') != tuple(store_filters.items()):
+        st.session_state.store_filter_key = tuple(store_filters.items())
+        st.session_state.store_cursors = [None]
+    store_cursors = st.session_state.store_cursors
+    
+    if not stored_total:
+        st.info("No stored analyses match these filters.")
+    else:
+        page_count = (stored_total + STORE_PAGE_SIZE - 1) // STORE_PAGE_SIZE
+        page = len(store_cursors)
+        rows = analysis_store.query(**store_filters, limit=STORE_PAGE_SIZE, before=store_cursors[-1])
+        stored_df = pd.DataFrame(rows)
+        stored_df['timestamp'] = pd.to_datetime(stored_df['timestamp'], unit='s')
+        stored_df['risk_band'] = [RISK_BANDS[band] for band in stored_df['risk_band']]
+        stored_df['patterns_detected'] = stored_df['patterns_detected'].str.join(", ")
+        st.dataframe(
+            stored_df[['timestamp', 'text_preview', 'overall_risk', 'risk_band', 'pattern_count', 'patterns_detected', 'word_count']],
+            use_container_width=True, hide_index=True
+        )
+        nav_col1, nav_col2, nav_col3 = st.columns([1, 2, 1])
+        with nav_col1:
+            if st.button("◀ Newer", use_container_width=True, key="store_newer", disabled=page == 1):
+                store_cursors.pop()
+                st.rerun()
+        with nav_col2:
+            st.caption(f"{stored_total} matching analyses · page {page} of {page_count}")
+        with nav_col3:
+            if st.button("Older ▶", use_container_width=True, key="store_older",
+                         disabled=page >= page_count or len(rows) < STORE_PAGE_SIZE):
+                store_cursors.append((rows[-1]['timestamp'], rows[-1]['id']))
+                st.rerun()
+        
+        # The export covers the whole store, so it is written only on request
+        # and kept until the filters or format change
+        stored_format = st.radio("Export format", export_formats(), horizontal=True, key="store_export_format",
+                                 format_func=str.upper)
+        export_key = (stored_format, tuple(store_filters.items()))
+        prepared = st.session_state.get('stored_export')
+        if prepared and (prepared['key'] != export_key or not os.path.exists(prepared['path'])):
+            discard_stored_export()
+            prepared = None
+        
+        if st.button(f"Prepare {stored_total} Matching Analyses for Export", use_container_width=True,
+                     key="store_prepare_export"):
+            discard_stored_export()
+            with st.spinner("Writing export..."):
+                prepared = {'key': export_key, 'total': stored_total,
+                            'path': prepare_stored_export(stored_format, **store_filters)}
+            st.session_state.stored_export = prepared
+        
+        if prepared:
+            with open(prepared['path'], 'rb') as export_file:
+                st.download_button(
+                    label=f"Download Matching Analyses as {stored_format.upper()}",
+                    data=export_file,
+                    file_name=f"stored_analyses.{stored_format}",
+                    mime=EXPORT_MIME_TYPES[stored_format],
+                    use_container_width=True
+                )
+            st.caption(f"Prepared with {prepared['total']} analyses; prepare again to include newer ones.")
+    
+    # Stage timings, when the app runs with PATTERN_METRICS=memory or prometheus
+    if isinstance(pipeline_metrics.sink, MemorySink):
+        st.markdown("#### ⏱️ Pipeline Timings")
+        timings = pipeline_metrics.sink.summary()
+        if timings:
+            st.dataframe(pd.DataFrame(timings), use_container_width=True, hide_index=True)
+        else:
+            st.caption("No timings recorded yet.")
 
 # -------------------------------
 # FOOTER
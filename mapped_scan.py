@@ -0,0 +1,164 @@
+# ===============================
+# MEMORY-MAPPED DOCUMENT SCAN
+# Windowed indicator matching over files too large to load as one string
+# ===============================
+#
+# Run with `python mapped_scan.py transcript.txt` to print the document's
+# score record as JSON.
+
+import argparse
+import json
+import mmap
+import os
+
+import numpy as np
+
+from pattern_engine import PatternRecognitionEngine, _metrics_from_counts, tokenize
+from pipeline_metrics import metrics
+from score_corpus import score_record
+from text_normalization import fold_text, latin_dominant, utf8_script_counts
+
+DEFAULT_WINDOW_BYTES = 4 * 1024 * 1024
+
+# ASCII whitespace never occurs inside a multi-byte UTF-8 sequence, so a
+# cut just after one is always a character boundary
+WHITESPACE_BYTES = (b'\n', b' ', b'\t', b'\r')
+
+
+def _cut_before(data, start, end):
+    """Offset just past the last whitespace byte in [start, end), else past the next one"""
+    if end >= len(data):
+        return len(data)
+    cut = max(data.rfind(space, start, end) for space in WHITESPACE_BYTES)
+    return cut + 1 if cut >= start else _cut_after(data, end)
+
+
+def _cut_after(data, position):
+    """Offset just past the first whitespace byte at or after `position`"""
+    found = [data.find(space, position) for space in WHITESPACE_BYTES]
+    found = [offset for offset in found if offset >= 0]
+    return min(found) + 1 if found else len(data)
+
+
+def _release(data, start, end):
+    """Hand the whole pages of a memory map within [start, end) back to the OS"""
+    end = min(end, len(data))
+    if not isinstance(data, mmap.mmap) or not hasattr(mmap, 'MADV_DONTNEED'):
+        return
+    if end // mmap.PAGESIZE > start // mmap.PAGESIZE:
+        page = start - start % mmap.PAGESIZE
+        data.madvise(mmap.MADV_DONTNEED, page, end - end % mmap.PAGESIZE - page)
+
+
+def iter_windows(data, window_bytes=DEFAULT_WINDOW_BYTES, overlap_bytes=0, overlap_ok=None):
+    """Decode UTF-8 `data` as consecutive (chunk, overlap) strings.
+
+    Chunks tile the data, each ending just after a whitespace character
+    at most `window_bytes` in (or at the first one past that, in a longer
+    whitespace-free run). The overlap is the text following the chunk,
+    at least `overlap_bytes` of it, also ending after whitespace, and
+    extended further until `overlap_ok(overlap)` holds, if given. Pages
+    of a memory map that were already scanned are handed back to the OS.
+    """
+    start = 0
+    while start < len(data):
+        cut = _cut_before(data, start, start + window_bytes)
+        overlap_end = _cut_after(data, cut + overlap_bytes) if overlap_bytes and cut < len(data) else cut
+        overlap = data[cut:overlap_end].decode('utf-8')
+        while overlap_ok is not None and overlap_end < len(data) and not overlap_ok(overlap):
+            overlap_end = _cut_after(data, overlap_end + overlap_bytes)
+            overlap = data[cut:overlap_end].decode('utf-8')
+        yield data[start:cut].decode('utf-8'), overlap
+        _release(data, start, cut)
+        start = cut
+
+
+def folds_confusables(data, block_bytes=DEFAULT_WINDOW_BYTES):
+    """text_normalization.folds_confusables for UTF-8 `data`, counted block by block"""
+    letters = non_ascii = 0
+    for start in range(0, len(data), block_bytes):
+        block_letters, block_non_ascii = utf8_script_counts(data[start:start + block_bytes])
+        letters += block_letters
+        non_ascii += block_non_ascii
+        _release(data, start, start + block_bytes)
+    return latin_dominant(letters, non_ascii)
+
+
+def _iter_window_matches(matcher, windows, metric_counts, confusables):
+    """Matches over the whole document, in folded-text offsets, one window at a time.
+
+    Each window's matches are taken only where they start inside its
+    chunk; the overlap is long enough to hold any indicator starting
+    there. Metric counts for every chunk are added to `metric_counts`.
+    """
+    offset = 0
+    for chunk, overlap in windows:
+        metric_counts += tokenize(chunk).counts
+        # Folding works character by character, so folding each chunk
+        # alone gives the same characters as folding the whole text
+        chunk_folded = fold_text(chunk, confusables).text
+        for keyword, start in matcher.iter_matches(chunk_folded + fold_text(overlap, confusables).text):
+            if start < len(chunk_folded):
+                yield keyword, offset + start
+        offset += len(chunk_folded)
+
+
+def analyze_file(engine, path, window_bytes=DEFAULT_WINDOW_BYTES):
+    """Score a UTF-8 file without holding its text in memory.
+
+    The file is memory-mapped and scanned in windows of about
+    `window_bytes`, overlapping by enough to catch indicators that cross a
+    window edge. Words, numbers, capitals and sentence delimiters never
+    straddle a cut, since cuts fall just after whitespace.
+
+    Scores, detected patterns and text metrics equal those of
+    `analyze_patterns` on the decoded file. The per-sentence timeline is
+    left out; it would grow with the document. Peak memory is set by the
+    window size, plus the longest run of text without whitespace.
+    """
+    compiled = engine.compiled
+    matcher = compiled.matcher
+    longest = int(compiled.keyword_lengths.max()) if len(compiled.keyword_lengths) else 0
+    # Up to four UTF-8 bytes per character, plus one for boundary checks;
+    # characters that fold away can stretch an indicator further
+    overlap_bytes = 4 * (longest + 1)
+
+    clock = metrics.stage_clock('analysis', pipeline='mapped')
+    metric_counts = np.zeros(7, dtype=np.int64)
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        # Empty files cannot be mapped
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        try:
+            # Look-alike folding is decided for the whole document first
+            confusables = folds_confusables(data, window_bytes)
+            clock('normalize')
+            windows = iter_windows(
+                data, window_bytes, overlap_bytes,
+                lambda overlap: len(fold_text(overlap, confusables).text) > longest
+            )
+            hits = matcher.count_hits(_iter_window_matches(matcher, windows, metric_counts, confusables))
+        finally:
+            if size:
+                data.close()
+    clock('match')
+
+    results = engine._score_hits(matcher.group_hits(hits), _metrics_from_counts(metric_counts), compiled)
+    clock('score', 1.0)
+    metrics.increment('analysis_bytes_total', size, pipeline='mapped')
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Score one large UTF-8 document in memory-mapped windows.')
+    parser.add_argument('path', help='UTF-8 text file')
+    parser.add_argument('--window-mb', type=float, default=DEFAULT_WINDOW_BYTES / 2 ** 20, help='window size')
+    parser.add_argument('--registry', help='pattern registry file (default: patterns.json)')
+    args = parser.parse_args(argv)
+    results = analyze_file(PatternRecognitionEngine(args.registry), args.path, int(args.window_mb * 2 ** 20))
+    print(json.dumps({**score_record(args.path, results), 'text_metrics': results['text_metrics']},
+                     indent=2, default=float))
+
+
+if __name__ == '__main__':
+    main()
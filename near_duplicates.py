@@ -0,0 +1,175 @@
+# ===============================
+# NEAR-DUPLICATE CLUSTERING
+# MinHash signatures and an LSH index that group copy-paste campaigns
+# ===============================
+
+from collections import OrderedDict
+
+import numpy as np
+
+from pattern_engine import IncrementalAnalyzer
+
+# Word characters by code point; anything past the table counts as one
+_WORD_TABLE = np.array([chr(c).isalnum() or c == 0x5F for c in range(0x3000)])
+
+_EMPTY = np.iinfo(np.uint64).max
+_MIX = (np.uint64(0x9E3779B97F4A7C15), np.uint64(0xBF58476D1CE4E5B9), np.uint64(0x94D049BB133111EB))
+
+
+def _mix(values):
+    """SplitMix64 finalizer: spreads every input bit over the whole word"""
+    values = (values ^ (values >> np.uint64(30))) * _MIX[1]
+    values = (values ^ (values >> np.uint64(27))) * _MIX[2]
+    return values ^ (values >> np.uint64(31))
+
+
+def word_hashes(text_lower):
+    """64-bit hash per word, computed over code points without a Python loop"""
+    codes = np.frombuffer(text_lower.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+    is_word = np.ones(len(codes), dtype=bool)
+    known = codes < len(_WORD_TABLE)
+    is_word[known] = _WORD_TABLE[codes[known]]
+
+    positions = np.flatnonzero(is_word)
+    if not len(positions):
+        return np.zeros(0, dtype=np.uint64)
+    starts = np.flatnonzero(np.diff(positions, prepend=-2) != 1)
+    offsets = positions - np.repeat(positions[starts], np.diff(np.append(starts, len(positions))))
+    # Position-salted character hashes summed per word keep letter order significant
+    chars = _mix(codes[positions].astype(np.uint64) * _MIX[0] + offsets.astype(np.uint64))
+    return _mix(np.add.reduceat(chars, starts))
+
+
+def shingle_hashes(text, size=4):
+    """64-bit hashes of the lowercased word `size`-grams of `text`.
+
+    Texts shorter than one shingle become a single shingle of all their
+    words.
+    """
+    hashes = word_hashes(text.lower())
+    if not len(hashes):
+        return np.zeros(1, dtype=np.uint64)
+    size = min(size, len(hashes))
+    count = len(hashes) - size + 1
+    combined = np.zeros(count, dtype=np.uint64)
+    for offset in range(size):
+        combined = combined * _MIX[0] + hashes[offset:offset + count]
+    return _mix(combined)
+
+
+class NearDuplicateIndex:
+    """Clusters near-duplicate documents and reuses analyses within a cluster.
+
+    Signatures use one-permutation MinHash: each shingle hash falls into
+    one of `num_perm` bins and every bin keeps its minimum. A document's
+    signature is looked up in an LSH table holding the canonical (first)
+    member of every cluster. Bands whose bins are all empty, common in
+    short texts, are left out of it, since every short text would share
+    them. If a candidate's estimated Jaccard similarity reaches
+    `threshold`, the document joins that cluster. It is then
+    analyzed incrementally against the cluster's previous member, so only
+    the sentences that changed are rescored. Results always equal
+    `analyze_patterns`.
+
+    Per-cluster analysis state is kept for the `max_analyzers` most
+    recently used clusters.
+    """
+
+    def __init__(self, engine, threshold=0.8, num_perm=64, bands=16, shingle_size=4, max_analyzers=1024):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.engine = engine
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.max_analyzers = max_analyzers
+
+        self.signatures = []      # canonical signature per cluster
+        self.sizes = []           # members per cluster
+        self.reused = 0           # documents analyzed against an earlier cluster member
+        self._buckets = [{} for _ in range(bands)]
+        self._analyzers = OrderedDict()
+
+    def __getstate__(self):
+        # Analysis state is a cache; a restored index rebuilds it on demand
+        state = self.__dict__.copy()
+        state['_analyzers'] = OrderedDict()
+        return state
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def signature(self, text):
+        """Minimum shingle hash per bin; empty bins hold the maximum uint64"""
+        hashes = shingle_hashes(text, self.shingle_size)
+        signature = np.full(self.num_perm, _EMPTY, dtype=np.uint64)
+        np.minimum.at(signature, hashes % np.uint64(self.num_perm), hashes // np.uint64(self.num_perm))
+        return signature
+
+    def similarity(self, signatures, signature):
+        """Estimated Jaccard similarity of each row of `signatures` with `signature`.
+
+        Bins empty in both signatures carry no information and are left
+        out, which keeps short texts from looking alike.
+        """
+        both_empty = (signatures == _EMPTY) & (signature == _EMPTY)
+        matching = (signatures == signature) & ~both_empty
+        return matching.sum(axis=1) / np.maximum(1, self.num_perm - both_empty.sum(axis=1))
+
+    def _keys(self, signature):
+        """LSH key per band, or None for a band with every bin empty"""
+        return [None if (band == _EMPTY).all() else band.tobytes() for band in np.split(signature, self.bands)]
+
+    def _open(self, signature, keys):
+        cluster_id = len(self.signatures)
+        self.signatures.append(signature)
+        self.sizes.append(1)
+        for bucket, key in zip(self._buckets, keys):
+            if key is not None:
+                bucket.setdefault(key, []).append(cluster_id)
+        return cluster_id
+
+    def restore(self, signatures, members):
+        """Refill an empty index from checkpointed state.
+
+        `signatures` holds each cluster's canonical signature in the order
+        the clusters were opened, and `members` the cluster id of every
+        document assigned so far; the LSH buckets are rebuilt from them.
+        """
+        for signature in signatures:
+            self._open(signature, self._keys(signature))
+        self.sizes = np.bincount(members, minlength=len(self.signatures)).tolist()
+
+    def assign(self, text):
+        """Cluster id for `text`, opening a new cluster if nothing is similar enough"""
+        signature = self.signature(text)
+        keys = self._keys(signature)
+        candidates = set()
+        for bucket, key in zip(self._buckets, keys):
+            if key is not None:
+                candidates.update(bucket.get(key, ()))
+
+        if candidates:
+            # Ties go to the oldest cluster
+            candidates = sorted(candidates)
+            similarity = self.similarity(np.stack([self.signatures[c] for c in candidates]), signature)
+            best = int(np.argmax(similarity))
+            if similarity[best] >= self.threshold:
+                self.sizes[candidates[best]] += 1
+                return candidates[best]
+
+        return self._open(signature, keys)
+
+    def analyze(self, text):
+        """Return (results, cluster_id), reusing the cluster's earlier analysis"""
+        cluster_id = self.assign(text)
+        analyzer = self._analyzers.pop(cluster_id, None)
+        if analyzer is None:
+            analyzer = IncrementalAnalyzer(self.engine)
+        else:
+            self.reused += 1
+        self._analyzers[cluster_id] = analyzer
+        if len(self._analyzers) > self.max_analyzers:
+            self._analyzers.popitem(last=False)
+        return analyzer.analyze(text), cluster_id
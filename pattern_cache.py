@@ -0,0 +1,145 @@
+# ===============================
+# ANALYSIS RESULT CACHE
+# Content-hash LRU in memory with an optional SQLite tier on disk
+# ===============================
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+
+def normalize_text(text):
+    """Normalization applied before hashing; leaves every analysis result unchanged"""
+    return text.strip()
+
+
+def encode_results(results):
+    """Serialize results for the disk tier; the sentence risk array becomes a list"""
+    return json.dumps(results, default=lambda value: value.tolist() if isinstance(value, array) else float(value))
+
+
+def decode_results(payload):
+    results = json.loads(payload)
+    if 'sentence_risk' in results:
+        results['sentence_risk'] = array('f', results['sentence_risk'])
+    return results
+
+
+class AnalysisCache:
+    """Cache of `analyze_patterns` results keyed by text and pattern tables.
+
+    Keys combine a SHA-256 of the normalized text with the engine's pattern
+    fingerprint, so editing any indicator or weight stops old entries from
+    being served. Cached results are shared between callers and must be
+    treated as read-only.
+    """
+
+    def __init__(self, engine, max_entries=1024, db_path=None):
+        self.engine = engine
+        self.max_entries = max_entries
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+        if db_path:
+            self._db = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS analysis_cache ('
+                'key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, '
+                'results TEXT NOT NULL, created REAL NOT NULL)'
+            )
+            self.prune_disk()
+
+    def cache_key(self, text):
+        digest = hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+        return f"{self.engine.fingerprint}:{digest}"
+
+    def analyze(self, text, progress=None, compute=None):
+        """Return cached results for `text`, analyzing it on a miss.
+
+        `compute(text, progress=...)` replaces `engine.analyze_patterns` on a
+        miss, e.g. an IncrementalAnalyzer's `analyze`.
+        """
+        key = self.cache_key(text)
+
+        with self._lock:
+            results = self._entries.get(key)
+            if results is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return results
+
+        results = self._load(key)
+        if results is not None:
+            with self._lock:
+                self.disk_hits += 1
+                self._remember(key, results)
+            return results
+
+        compute = compute or self.engine.analyze_patterns
+        results = compute(normalize_text(text), progress=progress)
+        with self._lock:
+            self.misses += 1
+        if not key.startswith(self.engine.fingerprint + ':'):
+            # The pattern registry was swapped mid-analysis; don't file
+            # these results under either fingerprint
+            return results
+        with self._lock:
+            self._remember(key, results)
+        self._store(key, results)
+        return results
+
+    def _remember(self, key, results):
+        self._entries[key] = results
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load(self, key):
+        if self._db is None:
+            return None
+        with self._lock:
+            row = self._db.execute('SELECT results FROM analysis_cache WHERE key = ?', (key,)).fetchone()
+        return decode_results(row[0]) if row else None
+
+    def _store(self, key, results):
+        if self._db is None:
+            return
+        with self._lock, self._db:
+            self._db.execute(
+                'INSERT OR REPLACE INTO analysis_cache (key, fingerprint, results, created) VALUES (?, ?, ?, ?)',
+                (key, key.split(':', 1)[0], encode_results(results), time.time())
+            )
+
+    def prune_disk(self):
+        """Delete on-disk entries written under other pattern tables"""
+        if self._db is None:
+            return 0
+        with self._lock, self._db:
+            cursor = self._db.execute('DELETE FROM analysis_cache WHERE fingerprint != ?', (self.engine.fingerprint,))
+        return cursor.rowcount
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                with self._db:
+                    self._db.execute('DELETE FROM analysis_cache')
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries
+            }
@@ -0,0 +1,100 @@
+# ===============================
+# COLUMNAR PATTERN SCORING
+# Scores a whole text column at once with pandas string ops and NumPy
+# ===============================
+
+import re
+import numpy as np
+import pandas as pd
+
+from pattern_engine import PatternRecognitionEngine, score_patterns
+from text_normalization import fold_text
+
+
+def count_indicators(texts, indicators, boundaries=None):
+    """Return an (n_texts, n_indicators) matrix of non-overlapping hit counts.
+
+    `indicators` must already be folded (see text_normalization.fold_text),
+    as the texts are before counting, or a tuple of equal-length forms
+    counted together, like `IndicatorMatcher.forms`. Each indicator is
+    counted over the whole column in one string-array operation, which
+    pandas hands to Arrow compute kernels when the column is Arrow-backed.
+
+    `boundaries` optionally gives each indicator's (check before, check
+    after) word-boundary flags, as in `IndicatorMatcher.boundaries`. Those
+    indicators are counted with Python's `re`, whose \\b agrees with the
+    matcher on non-ASCII letters where Arrow's does not.
+    """
+    texts = texts.fillna('').astype(str)
+    texts_lower = texts.str.lower()
+    # ASCII text folds by lower-casing alone; only the rest leaves the kernels
+    unfolded = ~texts.str.isascii()
+    if unfolded.any():
+        texts_lower[unfolded] = texts[unfolded].map(lambda text: fold_text(text).text)
+    counts = np.zeros((len(texts_lower), len(indicators)), dtype=np.int64)
+    boundaries = boundaries or [None] * len(indicators)
+    for col, (indicator, edges) in enumerate(zip(indicators, boundaries)):
+        forms = (indicator,) if isinstance(indicator, str) else indicator
+        escaped = '|'.join(re.escape(form) for form in forms)
+        if len(forms) > 1:
+            escaped = f'(?:{escaped})'
+        if edges is None:
+            counts[:, col] = texts_lower.str.count(escaped).to_numpy(dtype=np.int64)
+        else:
+            pattern = re.compile(('\\b' if edges[0] else '') + escaped + ('\\b' if edges[1] else ''))
+            counts[:, col] = [len(pattern.findall(text)) for text in texts_lower]
+    return counts
+
+
+def _table_scores(counts, columns, tables, keyword_columns):
+    """Raw score and distinct-indicator count per text and pattern, one pattern per row"""
+    patterns = [pattern for table in tables for pattern in table.items()]
+    raw = np.zeros((len(patterns), counts.shape[0]))
+    found = np.zeros((len(patterns), counts.shape[0]), dtype=np.int64)
+    for j, (pattern_id, pattern) in enumerate(patterns):
+        cols = [columns[c] for c in keyword_columns[pattern_id] if c is not None]
+        if not cols:
+            continue
+        pattern_counts = counts[:, cols]
+        raw[j] = pattern_counts.sum(axis=1) * pattern['weight']
+        found[j] = (pattern_counts > 0).sum(axis=1)
+    return raw, found
+
+
+def score_text_column(texts, engine=None):
+    """Score a text column, returning one row per text.
+
+    The result has one column per disinformation and authenticity pattern
+    score (0.0 where the pattern is absent) plus `pattern_count`,
+    `overall_risk_score` and `authenticity_score`, matching
+    `PatternRecognitionEngine.analyze_patterns` to floating-point tolerance.
+    """
+    engine = engine or PatternRecognitionEngine()
+    if not isinstance(texts, pd.Series):
+        texts = pd.Series(texts)
+
+    # One compiled set throughout, even if the registry is swapped meanwhile
+    compiled = engine.compiled
+
+    # Count each distinct set of folded forms (and boundary mode) once
+    matcher = compiled.matcher
+    distinct = {}
+    columns = {}
+    for keyword, forms in enumerate(matcher.forms):
+        columns[keyword] = distinct.setdefault((forms, matcher.boundaries[keyword]), len(distinct))
+    indicators, boundaries = zip(*distinct) if distinct else ((), ())
+    counts = count_indicators(texts, list(indicators), list(boundaries))
+
+    # Every text is scored at once, pattern by pattern
+    n_patterns = len(compiled.patterns)
+    raw, found = _table_scores(
+        counts, columns, (compiled.patterns, compiled.authenticity_patterns), matcher.pattern_keywords
+    )
+    scored = score_patterns(raw, found[:n_patterns] >= 2, n_patterns, compiled.scoring)
+
+    frame = pd.DataFrame(scored['scores'].T, columns=[*compiled.patterns, *compiled.authenticity_patterns],
+                         index=texts.index)
+    frame['pattern_count'] = scored['detected']
+    frame['overall_risk_score'] = scored['risk']
+    frame['authenticity_score'] = scored['authenticity']
+    return frame
@@ -0,0 +1,945 @@
+# ===============================
+# PATTERN RECOGNITION ENGINE
+# Headless analysis core shared by the Streamlit app and batch tooling
+# ===============================
+
+import copy
+import hashlib
+import json
+import os
+import re
+import numpy as np
+from array import array
+from collections import Counter, deque, namedtuple
+from multiprocessing import Pool, cpu_count
+
+try:
+    import ahocorasick  # optional C automaton (pyahocorasick)
+except ImportError:
+    ahocorasick = None
+
+from pattern_registry import DEFAULT_REGISTRY_PATH, DEFAULT_SCORING, RegistryError, read_registry, validate_registry
+from pipeline_metrics import metrics
+from text_normalization import NORMALIZATION_VERSION, fold_text, folds_confusables
+
+
+# -------------------------------
+# INDICATOR MATCHER
+# -------------------------------
+IndicatorHit = namedtuple('IndicatorHit', ['pattern_id', 'indicator', 'weight', 'start', 'end'])
+
+# Largest full transition table (states x distinct characters) the
+# pure-Python matcher builds; bigger indicator sets follow failure links
+DENSE_TABLE_LIMIT = 500000
+
+
+def _is_word_char(ch):
+    """Same test as the regex \\w class"""
+    return ch.isalnum() or ch == '_'
+
+
+class IndicatorMatcher:
+    """Aho-Corasick automaton over the indicators of every pattern table.
+
+    All indicators are folded (see text_normalization.fold_text) and
+    compiled once, so a single pass over the folded text reports every hit
+    regardless of how many indicators are defined. An indicator whose
+    look-alike folding differs, such as one written in Cyrillic or Greek,
+    is compiled in both forms under one keyword: text that is mostly Latin
+    has its look-alikes folded, and the indicator must still match there.
+
+    Uses pyahocorasick when it is installed and pure-Python tables
+    otherwise: a full transition table for small indicator sets, goto and
+    failure links once that table would exceed DENSE_TABLE_LIMIT entries.
+
+    Indicators listed in a pattern's optional `whole_words` only match as
+    whole words, as if wrapped in regex \\b anchors; the boundaries are
+    checked on each hit during the same scan.
+    """
+
+    def __init__(self, patterns):
+        self.keywords = []        # (pattern_id, indicator, weight) per keyword
+        self.pattern_keywords = {}  # pattern_id -> keyword index per indicator
+        self.boundaries = []      # (check before, check after) per keyword, or None
+        self.folded = []          # folded indicator per keyword
+        self.forms = []           # every folded form matched for the keyword, `folded` first
+
+        for pattern_id, pattern in patterns.items():
+            whole_words = set(pattern.get('whole_words', ()))
+            keyword_ids = []
+            for indicator in pattern['indicators']:
+                # An indicator of nothing but invisible characters folds away
+                folded = fold_text(indicator, confusables=False).text if isinstance(indicator, str) else ''
+                if not folded:
+                    keyword_ids.append(None)
+                    continue
+
+                keyword_ids.append(len(self.keywords))
+                self.keywords.append((pattern_id, indicator, pattern['weight']))
+                self.folded.append(folded)
+                # Look-alikes are single letters, so both forms have one length
+                confusable = fold_text(indicator, confusables=True).text
+                self.forms.append((folded,) if confusable == folded else (folded, confusable))
+                edges = (_is_word_char(folded[0]), _is_word_char(folded[-1]))
+                self.boundaries.append(edges if indicator in whole_words and any(edges) else None)
+            self.pattern_keywords[pattern_id] = keyword_ids
+
+        self._lengths = [len(folded) for folded in self.folded]
+
+        self._automaton = None
+        self._goto = self._fail = self._delta = self._output = None
+        if ahocorasick is None or not self.keywords:
+            self._build_tables()
+        else:
+            # Each word carries (keyword, length, boundaries) for its keywords
+            words = {}
+            for keyword, forms in enumerate(self.forms):
+                for form in forms:
+                    words.setdefault(form, []).append(
+                        (keyword, self._lengths[keyword], self.boundaries[keyword])
+                    )
+            self._automaton = ahocorasick.Automaton()
+            for word, keywords in words.items():
+                self._automaton.add_word(word, tuple(keywords))
+            self._automaton.make_automaton()
+
+    def _build_tables(self):
+        """Trie plus failure links for the pure-Python scan"""
+        goto = [{}]
+        output = [[]]
+        for keyword, forms in enumerate(self.forms):
+            for form in forms:
+                state = 0
+                for ch in form:
+                    if ch not in goto[state]:
+                        goto.append({})
+                        output.append([])
+                        goto[state][ch] = len(goto) - 1
+                    state = goto[state][ch]
+                output[state].append(keyword)
+
+        # Breadth-first, so every state's failure target is resolved first
+        fail = [0] * len(goto)
+        order = []
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            order.append(state)
+            output[state] = output[state] + output[fail[state]]
+            for ch, child in goto[state].items():
+                target = fail[state]
+                while target and ch not in goto[target]:
+                    target = fail[target]
+                fail[child] = goto[target].get(ch, 0) if state else 0
+                queue.append(child)
+        self._output = [tuple(keywords) for keywords in output]
+
+        alphabet = set().union(*goto)
+        if len(goto) * max(1, len(alphabet)) <= DENSE_TABLE_LIMIT:
+            # Fold the failure links into a full transition table so the
+            # scan never has to follow them
+            delta = [dict(goto[0])] + [None] * (len(goto) - 1)
+            for state in order:
+                delta[state] = {**delta[fail[state]], **goto[state]}
+            self._delta = delta
+        else:
+            self._goto = goto
+            self._fail = fail
+
+    def iter_matches(self, text_lower):
+        """Yield (keyword index, start offset) for every, possibly overlapping, hit"""
+        if self._automaton is not None:
+            for last, keywords in self._automaton.iter(text_lower):
+                for keyword, length, edges in keywords:
+                    start = last + 1 - length
+                    if edges is None or self._on_boundaries(text_lower, keyword, start):
+                        yield keyword, start
+            return
+
+        lengths = self._lengths
+        boundaries = self.boundaries
+        output = self._output
+        delta = self._delta
+        goto = self._goto
+        fail = self._fail
+        state = 0
+        for end, ch in enumerate(text_lower, 1):
+            if delta is not None:
+                state = delta[state].get(ch, 0)
+            else:
+                while state and ch not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(ch, 0)
+            if output[state]:
+                for keyword in output[state]:
+                    start = end - lengths[keyword]
+                    if boundaries[keyword] is None or self._on_boundaries(text_lower, keyword, start):
+                        yield keyword, start
+
+    def _on_boundaries(self, text_lower, keyword, start):
+        """True when a whole-word keyword's hit is not glued to other word characters"""
+        before, after = self.boundaries[keyword]
+        end = start + self._lengths[keyword]
+        if before and start > 0 and _is_word_char(text_lower[start - 1]):
+            return False
+        return not (after and end < len(text_lower) and _is_word_char(text_lower[end]))
+
+    def scan(self, text_lower):
+        """Return every indicator hit with its pattern id, weight and offsets"""
+        hits = []
+        for keyword, start in self.iter_matches(text_lower):
+            pattern_id, indicator, weight = self.keywords[keyword]
+            hits.append(IndicatorHit(pattern_id, indicator, weight, start, start + self._lengths[keyword]))
+        return hits
+
+    def count(self, text_lower):
+        """Count non-overlapping hits per keyword, matching str.count semantics"""
+        return self.count_matches(self.iter_matches(text_lower))
+
+    def count_matches(self, matches):
+        """Non-overlapping counts per keyword from already collected matches"""
+        counts = [0] * len(self.keywords)
+        for keyword, count in self.count_hits(matches).items():
+            counts[keyword] = count
+        return counts
+
+    def count_hits(self, matches):
+        """Like count_matches, but only for keywords that were hit: {keyword: count}"""
+        lengths = self._lengths
+        counts = {}
+        next_free = {}
+        for keyword, start in matches:
+            if start >= next_free.get(keyword, 0):
+                counts[keyword] = counts.get(keyword, 0) + 1
+                next_free[keyword] = start + lengths[keyword]
+        return counts
+
+    def count_by_pattern(self, text_lower):
+        """Map each pattern id to hit counts aligned with its indicator list"""
+        return self.group_by_pattern(self.count(text_lower))
+
+    def group_by_pattern(self, counts):
+        """Regroup per-keyword counts by pattern id, aligned with indicator lists"""
+        return {
+            pattern_id: [counts[k] if k is not None else 0 for k in keyword_ids]
+            for pattern_id, keyword_ids in self.pattern_keywords.items()
+        }
+
+    def group_hits(self, hits):
+        """Regroup {keyword: count} as {pattern_id: [(indicator, count), ...]} in indicator order.
+
+        Only keywords that were hit are visited, so the cost does not grow
+        with the number of indicators in the registry.
+        """
+        grouped = {}
+        for keyword in sorted(hits):
+            pattern_id, indicator, _ = self.keywords[keyword]
+            grouped.setdefault(pattern_id, []).append((indicator, hits[keyword]))
+        return grouped
+
+ANALYSIS_STAGES = ('normalize', 'tokenize', 'match', 'score', 'timeline')
+
+# Smallest shard worth sending to another process when one document is
+# analyzed with several workers
+SHARD_MIN_CHARS = 256 * 1024
+
+# Compiled once at import rather than looked up on every analysis
+SENTENCE_SPLIT_RE = re.compile(r'[.!?]+')
+SEGMENT_END_RE = re.compile(r'[.!?]+\s+')
+
+# Delimiter runs, caps runs and numbers draw on disjoint characters, so one
+# alternation finds exactly what separate scans for each would. The leading
+# lookahead lets the regex engine skip straight to candidate characters.
+TOKEN_RE = re.compile(r'(?=[.!?A-Z\d])(?:([.!?]+)|(\b[A-Z]{3,}\b)|(\b\d+\b))')
+
+TextTokens = namedtuple('TextTokens', ['counts', 'delimiters'])
+
+
+def _report_stage(progress, stage):
+    if progress is not None:
+        progress(stage, (ANALYSIS_STAGES.index(stage) + 1) / len(ANALYSIS_STAGES))
+
+
+def tokenize(text):
+    """Metric counts and sentence delimiter spans from a single TOKEN_RE scan.
+
+    `counts` are the additive raw counts behind text_metrics; `delimiters`
+    is an (n, 2) array of delimiter run spans, which the timeline reuses
+    as sentence boundaries.
+    """
+    spans = [[], [], []]
+    for match in TOKEN_RE.finditer(text):
+        spans[match.lastindex - 1].append(match.span())
+    delimiters, caps, numbers = spans
+    # Every '!' and '?' in the text sits inside a delimiter run
+    runs = ''.join(text[start:end] for start, end in delimiters)
+    words = text.split()
+    counts = np.array([
+        len(words),
+        sum(map(len, words)),
+        runs.count('!'),
+        runs.count('?'),
+        len(caps),
+        len(numbers),
+        len(delimiters)
+    ], dtype=np.int64)
+    return TextTokens(counts, np.array(delimiters, dtype=np.int64).reshape(-1, 2))
+
+
+def _metrics_from_counts(counts):
+    word_count, letters, exclamations, questions, all_caps, numbers, delimiters = (int(c) for c in counts)
+    return {
+        'word_count': word_count,
+        'sentence_count': delimiters + 1,
+        'avg_word_length': np.float64(letters) / word_count if word_count else 0,
+        'exclamation_density': exclamations / max(1, word_count) * 1000,
+        'question_density': questions / max(1, word_count) * 1000,
+        'all_caps_count': all_caps,
+        'number_count': numbers
+    }
+
+
+def _file_stat(path):
+    """Modification time and size, or None when the file cannot be read"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def score_patterns(raw, multi, n_patterns, scoring):
+    """The scoring formula over per-pattern arrays, shared by every scoring path.
+
+    `raw` holds each pattern's weighted hit total, disinformation patterns
+    in the first `n_patterns` rows and authenticity patterns after, with
+    one column per document (or 1-D for a single document). `multi` flags
+    the disinformation patterns that matched two or more distinct
+    indicators. Returns the arrays along the way: per pattern the boosted
+    `raw` and capped `scores`; per document the `detected` pattern count,
+    `mean` and `peak` pattern score, their `blend`, the undiscounted `base`
+    risk, `auth_mean`, `authenticity` and the final `risk`.
+    """
+    raw = np.array(raw, dtype=np.float64)
+    raw[:n_patterns] = np.where(multi, raw[:n_patterns] * scoring['multi_indicator_boost'], raw[:n_patterns])
+    scores = np.minimum(1.0, raw)
+
+    # Summed a pattern at a time, so one document or a whole column of them
+    # round the same way
+    total = np.zeros(raw.shape[1:])
+    detected = np.zeros(raw.shape[1:], dtype=np.int64)
+    for row in scores[:n_patterns]:
+        total = total + row
+        detected += row > 0
+    auth_total = np.zeros(raw.shape[1:])
+    auth_detected = np.zeros(raw.shape[1:], dtype=np.int64)
+    for row in scores[n_patterns:]:
+        auth_total = auth_total + row
+        auth_detected += row > 0
+
+    mean = total / np.maximum(1, detected)
+    peak = scores[:n_patterns].max(axis=0, initial=0.0)
+    blend = mean * scoring['average_weight'] + peak * scoring['max_weight']
+    base = np.where(detected > 0, np.minimum(1.0, blend), 0.1)  # low baseline risk
+    auth_mean = auth_total / np.maximum(1, auth_detected)
+    authenticity = np.where(auth_detected > 0, np.minimum(1.0, auth_mean), 0.1)
+    # Authenticity reduces risk
+    risk = np.minimum(1.0, base * (1 - authenticity * scoring['authenticity_discount']))
+    return dict(raw=raw, scores=scores, detected=detected, mean=mean, peak=peak, blend=blend, base=base,
+                auth_mean=auth_mean, authenticity=authenticity, risk=risk)
+
+
+def pattern_fingerprint(*tables):
+    """Stable hash of pattern tables; changes whenever an indicator or weight does"""
+    payload = json.dumps(tables, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+# -------------------------------
+# DISINFORMATION PATTERN ANALYZER
+# -------------------------------
+class CompiledPatterns:
+    """One registry's pattern tables together with everything compiled from them.
+
+    Never modified once built, so the engine swaps in a new set with a
+    single assignment and an analysis that picked up the old set finishes
+    with it.
+    """
+
+    def __init__(self, patterns, authenticity_patterns, version=None, scoring=None):
+        self.patterns = patterns
+        self.authenticity_patterns = authenticity_patterns
+        self.version = version
+        self.scoring = {**DEFAULT_SCORING, **(scoring or {})}
+
+        # Compile every indicator into one automaton up front
+        self.matcher = IndicatorMatcher({**patterns, **authenticity_patterns})
+        # Default scoring leaves the fingerprint as it was before scoring was
+        # configurable; the folding rules decide what the tables match, so
+        # their version is part of it
+        self.fingerprint = pattern_fingerprint(
+            patterns, authenticity_patterns, *([self.scoring] if self.scoring != DEFAULT_SCORING else []),
+            {'normalization': NORMALIZATION_VERSION}
+        )
+
+        # Timeline lookups: disinformation pattern column per keyword (-1 otherwise)
+        pattern_columns = {pattern_id: j for j, pattern_id in enumerate(patterns)}
+        self.keyword_columns = np.array(
+            [pattern_columns.get(pattern_id, -1) for pattern_id, _, _ in self.matcher.keywords], dtype=np.int64
+        )
+        self.keyword_lengths = np.array(self.matcher._lengths, dtype=np.int64)
+        self.pattern_weights = [pattern['weight'] for pattern in patterns.values()]
+        self.pattern_names = [pattern['name'] for pattern in patterns.values()]
+
+        # Scoring lookups: index into patterns then authenticity_patterns per
+        # pattern, and that index and the weight per keyword
+        self.table_index = {pattern_id: j for j, pattern_id in enumerate([*patterns, *authenticity_patterns])}
+        self.keyword_patterns = np.array(
+            [self.table_index[pattern_id] for pattern_id, _, _ in self.matcher.keywords], dtype=np.int64
+        )
+        self.keyword_weights = np.array([weight for _, _, weight in self.matcher.keywords], dtype=np.float64)
+
+        # Per-segment analyses (see split_segments) add up to the whole
+        # text's unless an indicator could straddle a segment cut
+        self.segment_exact = not any(
+            re.search(r'^\s|[.!?]\s', form) for forms in self.matcher.forms for form in forms
+        )
+
+
+class PatternRecognitionEngine:
+    """Scores text against the patterns of a registry file (see pattern_registry).
+
+    `reload_if_changed` picks up edits to the registry while the process
+    runs; analyses already under way keep the patterns they started with.
+    """
+
+    def __init__(self, registry_path=None):
+        self.registry_path = registry_path or DEFAULT_REGISTRY_PATH
+        self.reload_error = None
+        self._registry_stat = None
+        self.reload()
+
+    # The current compiled set; read it once per analysis
+    @property
+    def patterns(self):
+        return self.compiled.patterns
+
+    @property
+    def authenticity_patterns(self):
+        return self.compiled.authenticity_patterns
+
+    @property
+    def matcher(self):
+        return self.compiled.matcher
+
+    @property
+    def fingerprint(self):
+        return self.compiled.fingerprint
+
+    @property
+    def version(self):
+        return self.compiled.version
+
+    def load_registry(self, registry):
+        """Validate and compile a registry mapping, then swap it in"""
+        validate_registry(registry)
+        self.compiled = CompiledPatterns(
+            registry['patterns'], registry['authenticity_patterns'], registry['version'], registry.get('scoring')
+        )
+
+    def reload(self):
+        """Re-read the registry file; raises RegistryError and keeps the current patterns if it is invalid"""
+        stat = _file_stat(self.registry_path)
+        self.load_registry(read_registry(self.registry_path))
+        self._registry_stat = stat
+        self.reload_error = None
+
+    def reload_if_changed(self):
+        """Reload when the registry file has changed since the last load.
+
+        A registry that fails to load leaves the current patterns in place
+        and is reported through `reload_error`. Returns True when new
+        patterns were swapped in.
+        """
+        stat = _file_stat(self.registry_path)
+        if stat == self._registry_stat:
+            return False
+        try:
+            self.reload()
+        except RegistryError as error:
+            self._registry_stat = stat
+            self.reload_error = str(error)
+            return False
+        return True
+    
+    def analyze_patterns(self, text, progress=None, workers=None):
+        """Analyze text for disinformation patterns.
+
+        If given, `progress(stage, fraction)` is called as each stage in
+        ANALYSIS_STAGES finishes. With metrics enabled, each stage is timed
+        under the 'full' pipeline label.
+
+        With `workers` above one, a text of at least two SHARD_MIN_CHARS
+        shards is split at sentence ends and the shards are analyzed in
+        that many worker processes (see _analyze_sharded). Results equal
+        those of a sequential run.
+        """
+        compiled = self.compiled
+        if workers and workers > 1 and compiled.segment_exact and len(text) >= 2 * SHARD_MIN_CHARS:
+            return self._analyze_sharded(text, compiled, workers, progress)
+        if metrics.enabled:
+            progress = metrics.stage_clock('analysis', progress, pipeline='full')
+            metrics.increment('analysis_characters_total', len(text), pipeline='full')
+        # Indicators are matched against folded text; metrics and sentences
+        # come from the text as written
+        folded = fold_text(text)
+        _report_stage(progress, 'normalize')
+        tokens = tokenize(text)
+        text_metrics = _metrics_from_counts(tokens.counts)
+        _report_stage(progress, 'tokenize')
+        
+        # Single pass over the text for every indicator; the hits are
+        # reused for the timeline
+        matches = list(compiled.matcher.iter_matches(folded.text))
+        hits = compiled.matcher.group_hits(compiled.matcher.count_hits(matches))
+        _report_stage(progress, 'match')
+        
+        results = self._score_hits(hits, text_metrics, compiled)
+        _report_stage(progress, 'score')
+        
+        sentence_risk, results['timeline_analysis'] = self._timeline_analysis(
+            text, folded, matches, tokens.delimiters, compiled
+        )
+        results['sentence_risk'] = array('f', sentence_risk.astype(np.float32).tobytes())
+        _report_stage(progress, 'timeline')
+        
+        return results
+    
+    def _analyze_sharded(self, text, compiled, workers, progress=None):
+        """analyze_patterns for one large text, split into shards across worker processes.
+
+        Shards are runs of whole segments (see split_segments), analyzed
+        like the segments of an IncrementalAnalyzer; their raw counts and
+        timelines are merged in text order. Look-alike folding is decided
+        once for the whole text, as analyze_patterns does.
+        """
+        if metrics.enabled:
+            progress = metrics.stage_clock('analysis', progress, pipeline='sharded')
+            metrics.increment('analysis_characters_total', len(text), pipeline='sharded')
+        confusables = text.isascii() or folds_confusables(text)
+        spans = shard_spans(text, min(workers, len(text) // SHARD_MIN_CHARS))
+        _report_stage(progress, 'normalize')
+
+        if len(spans) == 1:
+            partials = [_analyze_segment(self, compiled, text, confusables)]
+        else:
+            # Workers get the text once, through the initializer, and an
+            # engine pinned to the compiled set this analysis started with
+            pinned = copy.copy(self)
+            pinned.compiled = compiled
+            with Pool(len(spans), initializer=_init_shard_worker, initargs=(pinned, text)) as pool:
+                partials = pool.map(_analyze_shard, [(start, end, confusables) for start, end in spans])
+
+        metric_counts = np.zeros(7, dtype=np.int64)
+        keyword_totals = np.zeros(len(compiled.matcher.keywords), dtype=np.int64)
+        for counts, keywords, keyword_counts, _, _ in partials:
+            metric_counts += counts
+            keyword_totals[keywords] += keyword_counts
+        text_metrics = _metrics_from_counts(metric_counts)
+        _report_stage(progress, 'tokenize')
+        hit_keywords = np.flatnonzero(keyword_totals)
+        hits = dict(zip(hit_keywords.tolist(), keyword_totals[hit_keywords].tolist()))
+        _report_stage(progress, 'match')
+        results = self._score_hits(compiled.matcher.group_hits(hits), text_metrics, compiled)
+        _report_stage(progress, 'score')
+
+        sentence_risk, results['timeline_analysis'] = _join_timelines(partials)
+        results['sentence_risk'] = array('f', sentence_risk.astype(np.float32).tobytes())
+        _report_stage(progress, 'timeline')
+        return results
+    
+    def _score_hits(self, hits, text_metrics, compiled=None):
+        """Turn grouped hits (see IndicatorMatcher.group_hits) into the scored results dict"""
+        compiled = compiled or self.compiled
+        n_patterns = len(compiled.patterns)
+        
+        # Raw score per pattern; hits come grouped in pattern order
+        raw = np.zeros(len(compiled.table_index))
+        multi = np.zeros(n_patterns, dtype=bool)
+        for pattern_id, found in hits.items():
+            j = compiled.table_index.get(pattern_id)
+            if j is None:
+                continue
+            pattern = compiled.patterns[pattern_id] if j < n_patterns else compiled.authenticity_patterns[pattern_id]
+            score = 0
+            for _, count in found:
+                score += count * pattern['weight']
+            raw[j] = score
+            # Boost for multiple indicators
+            if j < n_patterns:
+                multi[j] = len(found) >= 2
+        scored = score_patterns(raw, multi, n_patterns, compiled.scoring)
+        
+        pattern_scores = {}
+        authenticity_scores = {}
+        for pattern_id, found in hits.items():
+            j = compiled.table_index.get(pattern_id)
+            if j is None or not scored['scores'][j] > 0:
+                continue
+            if j < n_patterns:
+                pattern = compiled.patterns[pattern_id]
+                score = float(scored['raw'][j])
+                pattern_scores[pattern_id] = {
+                    'score': min(1.0, score),
+                    'name': pattern['name'],
+                    'description': pattern['description'],
+                    'indicators_found': [indicator for indicator, _ in found],
+                    'confidence': min(0.95, score * 0.8 + 0.2)
+                }
+            else:
+                pattern = compiled.authenticity_patterns[pattern_id]
+                authenticity_scores[pattern_id] = {
+                    'score': float(scored['scores'][j]),
+                    'name': pattern['name'],
+                    'description': pattern['description']
+                }
+        
+        return {
+            'patterns_detected': pattern_scores,
+            'pattern_scores': {},
+            'overall_risk_score': float(scored['risk']),
+            'authenticity_score': float(scored['authenticity']),
+            'pattern_count': len(pattern_scores),
+            'text_metrics': text_metrics,
+            'timeline_analysis': [],
+            'authenticity_patterns': authenticity_scores
+        }
+    
+    def _timeline_analysis(self, text, folded, matches, delimiters=None, compiled=None):
+        """Risk for every sentence, built from the document-level matches.
+
+        `matches` are offsets into `folded`, the FoldedText of `text`. A hit
+        counts for a sentence when it lies entirely inside that sentence's
+        span of the original text. `delimiters` are the spans from
+        tokenize(text). Returns the per-sentence risk array and a timeline
+        entry for each flagged sentence.
+        """
+        compiled = compiled or self.compiled
+        if delimiters is None:
+            delimiters = tokenize(text).delimiters
+        starts = np.concatenate(([0], delimiters[:, 1]))
+        ends = np.concatenate((delimiters[:, 0], [len(text)]))
+        sentences = [text[start:end] for start, end in zip(starts.tolist(), ends.tolist())]
+        
+        present = np.zeros((len(sentences), len(compiled.patterns)), dtype=bool)
+        if matches:
+            keyword, start = np.array(matches, dtype=np.int64).T
+            column = compiled.keyword_columns[keyword]
+            start, end = folded.spans(start, start + compiled.keyword_lengths[keyword])
+            sentence = np.searchsorted(starts, start, side='right') - 1
+            inside = (column >= 0) & (end <= ends[sentence])
+            present[sentence[inside], column[inside]] = True
+        
+        # Accumulate weights in pattern order, as a per-sentence loop would;
+        # patterns hit nowhere would only add zeros
+        risk = np.zeros(len(sentences))
+        for j in np.flatnonzero(present.any(axis=0)):
+            risk += present[:, j] * compiled.pattern_weights[j]
+        eligible = np.array([len(sentence.strip()) > 10 for sentence in sentences])
+        risk = np.where(eligible, np.minimum(1.0, risk), 0.0)
+        
+        names = compiled.pattern_names
+        timeline = [
+            {
+                'index': int(i),
+                'sentence': sentences[i].strip(),
+                'risk': float(risk[i]),
+                'patterns': [names[j] for j in np.flatnonzero(present[i])][:2]
+            }
+            for i in np.flatnonzero(eligible & present.any(axis=1))
+        ]
+        return risk, timeline
+    
+    def analyze_batch(self, texts, workers=None, chunksize=None, ordered=True):
+        """Analyze many texts across a pool of worker processes.
+
+        The engine is pickled once per worker through the pool initializer
+        rather than once per document. With ``ordered=True`` a list of
+        results in input order is returned; otherwise a generator yields
+        ``(index, results)`` pairs as documents complete.
+        """
+        workers = workers or cpu_count()
+        if chunksize is None:
+            if hasattr(texts, '__len__'):
+                chunksize = max(1, len(texts) // (workers * 4))
+            else:
+                chunksize = 32
+        
+        if ordered:
+            if workers == 1:
+                return [self.analyze_patterns(text) for text in texts]
+            with Pool(workers, initializer=_init_worker, initargs=(self,)) as pool:
+                return list(pool.imap(_analyze_text, texts, chunksize))
+        
+        return self._iter_batch_completed(texts, workers, chunksize)
+    
+    def _iter_batch_completed(self, texts, workers, chunksize):
+        if workers == 1:
+            for index, text in enumerate(texts):
+                yield index, self.analyze_patterns(text)
+            return
+        with Pool(workers, initializer=_init_worker, initargs=(self,)) as pool:
+            yield from pool.imap_unordered(_analyze_indexed, enumerate(texts), chunksize)
+
+# -------------------------------
+# PATTERN DATABASE
+# -------------------------------
+def create_pattern_database():
+    """Create database of information patterns for analysis"""
+    
+    case_studies = [
+        {
+            'title': 'Emotional Amplification Case',
+            'text': 'SHOCKING BREAKING NEWS!!! The government is HIDING the REAL truth about this AMAZING discovery! Doctors are DEVASTATED by what they found! This will CHANGE everything FOREVER!!!',
+            'patterns': ['emotional_amplification', 'urgency_creation', 'conspiracy_framing'],
+            'risk_level': 'High',
+            'analysis_focus': 'Emotional manipulation through excessive punctuation and capitalization'
+        },
+        {
+            'title': 'Source Obfuscation Example',
+            'text': 'Experts say that this new discovery will revolutionize everything. Studies show amazing results that they don\'t want you to know about. Many people are already seeing incredible benefits.',
+            'patterns': ['source_obfuscation', 'miracle_solutions', 'social_proof'],
+            'risk_level': 'Medium',
+            'analysis_focus': 'Vague sourcing and unverified claims'
+        },
+        {
+            'title': 'Balanced Scientific Report',
+            'text': 'According to a study published in the Journal of Medical Research, researchers found a 15% improvement in outcomes. However, the study authors note limitations including sample size constraints and recommend further research to confirm findings.',
+            'patterns': ['source_transparency', 'methodology_disclosure', 'context_provision'],
+            'risk_level': 'Low',
+            'analysis_focus': 'Clear sourcing and balanced presentation'
+        },
+        {
+            'title': 'Binary Narrative Example',
+            'text': 'This solution works 100% of the time for EVERYONE. There are NO side effects and it is COMPLETELY safe. The mainstream media NEVER reports on this because they want to keep you in the dark.',
+            'patterns': ['binary_narrative', 'conspiracy_framing', 'miracle_solutions'],
+            'risk_level': 'High',
+            'analysis_focus': 'Absolute claims combined with conspiracy framing'
+        },
+        {
+            'title': 'Data-Driven Analysis',
+            'text': 'Analysis of data from the National Statistics Office shows a 3.2% economic growth. The methodology involved surveying 5,000 households across 50 regions. While positive, economists caution that seasonal factors may have influenced results.',
+            'patterns': ['data_specificity', 'methodology_disclosure', 'context_provision'],
+            'risk_level': 'Low',
+            'analysis_focus': 'Specific data with methodological transparency'
+        }
+    ]
+    
+    pattern_definitions = [
+        {
+            'name': 'Emotional Amplification',
+            'description': 'Uses excessive emotional language, punctuation, and capitalization to trigger emotional responses and bypass critical thinking.',
+            'examples': ['"SHOCKING revelation!"', '"DEVASTATING consequences!"', 'Multiple exclamation marks (!!!)'],
+            'detection_tip': 'Look for clusters of emotional adjectives and excessive punctuation.'
+        },
+        {
+            'name': 'False Urgency',
+            'description': 'Creates artificial time pressure to encourage quick sharing without verification.',
+            'examples': ['"BREAKING: Act NOW!"', '"Limited time offer!"', '"Share before deleted!"'],
+            'detection_tip': 'Check for time-sensitive language without actual time constraints.'
+        },
+        {
+            'name': 'Source Obfuscation',
+            'description': 'Uses vague references to authority ("experts say", "studies show") without specific citations.',
+            'examples': ['"Scientists confirm..."', '"Research indicates..."', '"They don\'t want you to know..."'],
+            'detection_tip': 'Ask "Which experts?" or "Which study?" to test specificity.'
+        },
+        {
+            'name': 'Binary Narrative',
+            'description': 'Presents complex issues as simple good/bad dichotomies with absolute language.',
+            'examples': ['"100% effective"', '"Everyone agrees"', '"Complete solution"'],
+            'detection_tip': 'Watch for absolutes (always, never, everyone, no one).'
+        }
+    ]
+    
+    return {
+        'case_studies': tuple(case_studies),
+        'pattern_definitions': tuple(pattern_definitions)
+    }
+
+# -------------------------------
+# INCREMENTAL RE-ANALYSIS
+# -------------------------------
+def split_segments(text):
+    """Cut text after each sentence delimiter run and its trailing whitespace.
+
+    Words, caps runs, numbers and delimiter runs never straddle these cuts,
+    so per-segment counts add up to the whole-text counts.
+    """
+    segments = []
+    start = 0
+    for match in SEGMENT_END_RE.finditer(text):
+        segments.append(text[start:match.end()])
+        start = match.end()
+    if start < len(text) or not segments:
+        segments.append(text[start:])
+    return segments
+
+
+def shard_spans(text, count):
+    """(start, end) spans cutting text into at most `count` runs of whole segments of similar length.
+
+    Every cut is one split_segments would make, so the shards' segments
+    are exactly the text's.
+    """
+    spans = []
+    start = 0
+    for k in range(1, count):
+        match = SEGMENT_END_RE.search(text, max(start, len(text) * k // count))
+        if match is None or match.end() == len(text):
+            break
+        spans.append((start, match.end()))
+        start = match.end()
+    spans.append((start, len(text)))
+    return spans
+
+
+def _analyze_segment(engine, compiled, segment, confusables):
+    """Metric counts, hit keywords and their counts, sentence risks and timeline entries for one segment"""
+    folded = fold_text(segment, confusables)
+    matcher = compiled.matcher
+    matches = list(matcher.iter_matches(folded.text))
+    hits = matcher.count_hits(matches)
+    tokens = tokenize(segment)
+    risk, timeline = engine._timeline_analysis(segment, folded, matches, tokens.delimiters, compiled)
+    keywords = np.fromiter(hits.keys(), dtype=np.int64, count=len(hits))
+    counts = np.fromiter(hits.values(), dtype=np.int64, count=len(hits))
+    return tokens.counts, keywords, counts, risk, timeline
+
+
+def _join_timelines(partials):
+    """Sentence risks and timeline entries of consecutive segments' analyses, as one text's"""
+    # Every segment but the last ends in a whitespace-only piece that
+    # merges into the next segment's first sentence
+    risks = []
+    timeline = []
+    base = 0
+    for k, (_, _, _, risk, entries) in enumerate(partials):
+        risks.append(risk if k == len(partials) - 1 else risk[:-1])
+        timeline.extend({**entry, 'index': base + entry['index']} for entry in entries)
+        base += len(risk) - 1
+    return np.concatenate(risks), timeline
+
+
+class IncrementalAnalyzer:
+    """Re-analyzes edited text by re-matching only the segments that changed.
+
+    Raw metric and indicator counts are kept per segment together with
+    running totals; a new version of the text only pays for segments that
+    were not in the previous one. Results equal `analyze_patterns`.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.reset()
+
+    def reset(self):
+        # Counts are only valid for the compiled set they were made with
+        self._compiled = self.engine.compiled
+        # An indicator that could straddle a segment cut would be missed
+        self.exact = self._compiled.segment_exact
+        # Look-alike folding is decided for the whole text; partials made
+        # under the other choice are dropped when it changes
+        self._confusables = None
+        self._partials = {}
+        self._segments = Counter()
+        self._metric_totals = np.zeros(7, dtype=np.int64)
+        self._keyword_totals = np.zeros(len(self._compiled.matcher.keywords), dtype=np.int64)
+        self.segments_rematched = 0
+
+    def _partial(self, segment):
+        """Metric counts, hit keywords and their counts, sentence risks and timeline entries for one segment"""
+        partial = self._partials.get(segment)
+        if partial is None:
+            partial = _analyze_segment(self.engine, self._compiled, segment, self._confusables)
+            self._partials[segment] = partial
+            self.segments_rematched += 1
+        return partial
+
+    def _account(self, partial, n):
+        metric_counts, keywords, counts, _, _ = partial
+        self._metric_totals += metric_counts * n
+        self._keyword_totals[keywords] += counts * n
+
+    def analyze(self, text, progress=None):
+        """Analyze `text`, reusing counts from the previous call where possible"""
+        if self._compiled is not self.engine.compiled:
+            self.reset()
+        if not self.exact:
+            return self.engine.analyze_patterns(text, progress=progress)
+        if metrics.enabled:
+            progress = metrics.stage_clock('analysis', progress, pipeline='incremental')
+            metrics.increment('analysis_characters_total', len(text), pipeline='incremental')
+        compiled = self._compiled
+        confusables = text.isascii() or folds_confusables(text)
+        if confusables != self._confusables:
+            self._partials = {}
+            self._segments = Counter()
+            self._metric_totals[:] = 0
+            self._keyword_totals[:] = 0
+            self._confusables = confusables
+        _report_stage(progress, 'normalize')
+
+        ordered = split_segments(text)
+        segments = Counter(ordered)
+        for segment, n in (segments - self._segments).items():
+            self._account(self._partial(segment), n)
+        for segment, n in (self._segments - segments).items():
+            self._account(self._partials[segment], -n)
+        self._segments = segments
+        self._partials = {segment: self._partials[segment] for segment in segments}
+
+        text_metrics = _metrics_from_counts(self._metric_totals)
+        _report_stage(progress, 'tokenize')
+        hit_keywords = np.flatnonzero(self._keyword_totals)
+        hits = dict(zip(hit_keywords.tolist(), self._keyword_totals[hit_keywords].tolist()))
+        _report_stage(progress, 'match')
+        results = self.engine._score_hits(compiled.matcher.group_hits(hits), text_metrics, compiled)
+        _report_stage(progress, 'score')
+
+        sentence_risk, results['timeline_analysis'] = _join_timelines([self._partials[s] for s in ordered])
+        results['sentence_risk'] = array('f', sentence_risk.astype(np.float32).tobytes())
+        _report_stage(progress, 'timeline')
+        return results
+
+# -------------------------------
+# BATCH WORKERS
+# -------------------------------
+_worker_engine = None
+_worker_text = None
+
+
+def _init_worker(engine):
+    """Install the engine shipped by the parent process in this worker"""
+    global _worker_engine
+    _worker_engine = engine
+
+
+def _analyze_text(text):
+    return _worker_engine.analyze_patterns(text)
+
+
+def _analyze_indexed(item):
+    index, text = item
+    return index, _worker_engine.analyze_patterns(text)
+
+
+def _init_shard_worker(engine, text):
+    """Install the engine and the document being sharded in this worker"""
+    global _worker_engine, _worker_text
+    _worker_engine = engine
+    _worker_text = text
+
+
+def _analyze_shard(item):
+    start, end, confusables = item
+    return _analyze_segment(_worker_engine, _worker_engine.compiled, _worker_text[start:end], confusables)
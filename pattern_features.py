@@ -0,0 +1,156 @@
+# ===============================
+# PATTERN FEATURE VECTORS
+# Fixed-width float32 features per document for downstream models
+# ===============================
+
+from array import array
+
+import numpy as np
+
+try:
+    import scipy.sparse  # optional; only needed for sparse batch output
+except ImportError:
+    scipy = None
+
+from pattern_engine import PatternRecognitionEngine, _metrics_from_counts, score_patterns, tokenize
+from pipeline_metrics import metrics
+from text_normalization import fold_text
+
+# text_metrics keys, in the order _metrics_from_counts builds them
+METRIC_FEATURES = (
+    'word_count', 'sentence_count', 'avg_word_length', 'exclamation_density',
+    'question_density', 'all_caps_count', 'number_count'
+)
+SUMMARY_FEATURES = ('overall_risk_score', 'authenticity_score', 'pattern_count')
+
+
+def feature_names(compiled):
+    """Column names of the feature vectors built from a CompiledPatterns set.
+
+    One hit count per pattern, then one score per pattern (both tables,
+    disinformation patterns first), then the summary scores and the
+    text_metrics values.
+    """
+    pattern_ids = [*compiled.patterns, *compiled.authenticity_patterns]
+    return ([f'count:{pattern_id}' for pattern_id in pattern_ids]
+            + [f'score:{pattern_id}' for pattern_id in pattern_ids]
+            + list(SUMMARY_FEATURES) + list(METRIC_FEATURES))
+
+
+def score_features(hits, metric_counts, compiled):
+    """Feature vector from {keyword: count} hits and tokenize() metric counts.
+
+    Raw scores are summed in the same order as
+    PatternRecognitionEngine._score_hits and go through the same
+    score_patterns, without building any per-pattern dicts.
+    """
+    n_patterns = len(compiled.patterns)
+    n_tables = n_patterns + len(compiled.authenticity_patterns)
+    keywords = np.fromiter(sorted(hits), dtype=np.int64, count=len(hits))
+    counts = np.array([hits[keyword] for keyword in keywords.tolist()], dtype=np.int64)
+    columns = compiled.keyword_patterns[keywords]
+
+    pattern_counts = np.bincount(columns, weights=counts, minlength=n_tables)
+    raw = np.zeros(n_tables)
+    np.add.at(raw, columns, counts * compiled.keyword_weights[keywords])
+    found = np.bincount(columns, minlength=n_tables)
+    scored = score_patterns(raw, found[:n_patterns] >= 2, n_patterns, compiled.scoring)
+
+    text_metrics = _metrics_from_counts(metric_counts)
+    return np.concatenate((
+        pattern_counts, scored['scores'],
+        [scored['risk'], scored['authenticity'], scored['detected']],
+        [text_metrics[name] for name in METRIC_FEATURES]
+    )).astype(np.float32)
+
+
+class DocumentFeatures:
+    """A document's feature vector, with the full results dict only on request.
+
+    `results()` builds what `analyze_patterns` returns, timeline included,
+    from the same compiled patterns the vector came from.
+    """
+
+    def __init__(self, engine, compiled, text, hits, metric_counts):
+        self.vector = score_features(hits, metric_counts, compiled)
+        self.compiled = compiled
+        self._engine = engine
+        self._text = text
+        self._hits = hits
+        self._metric_counts = metric_counts
+        self._results = None
+
+    @property
+    def names(self):
+        return feature_names(self.compiled)
+
+    def results(self):
+        if self._results is None:
+            engine = self._engine
+            compiled = self.compiled
+            results = engine._score_hits(
+                compiled.matcher.group_hits(self._hits), _metrics_from_counts(self._metric_counts), compiled
+            )
+            # The timeline needs match offsets, so the text is scanned again
+            folded = fold_text(self._text)
+            matches = list(compiled.matcher.iter_matches(folded.text))
+            sentence_risk, results['timeline_analysis'] = engine._timeline_analysis(
+                self._text, folded, matches, None, compiled
+            )
+            results['sentence_risk'] = array('f', sentence_risk.astype(np.float32).tobytes())
+            self._results = results
+        return self._results
+
+
+def _scan(compiled, text):
+    """Sparse keyword hits and raw metric counts for one text"""
+    matcher = compiled.matcher
+    hits = matcher.count_hits(matcher.iter_matches(fold_text(text).text))
+    return hits, tokenize(text).counts
+
+
+def analyze_features(text, engine=None):
+    """Score one text as a DocumentFeatures"""
+    engine = engine or PatternRecognitionEngine()
+    compiled = engine.compiled
+    clock = metrics.stage_clock('analysis', pipeline='features')
+    hits, metric_counts = _scan(compiled, text)
+    clock('match')
+    features = DocumentFeatures(engine, compiled, text, hits, metric_counts)
+    clock('score', 1.0)
+    return features
+
+
+def feature_matrix(texts, engine=None, sparse=False):
+    """Score many texts into an (n_texts, n_features) float32 matrix.
+
+    Returns (matrix, feature_names). The matrix is a dense NumPy array,
+    or with `sparse=True` a SciPy CSR matrix holding only nonzero counts
+    and scores (the summary and metric columns are nearly always set).
+    """
+    engine = engine or PatternRecognitionEngine()
+    # One compiled set throughout, even if the registry is swapped meanwhile
+    compiled = engine.compiled
+    names = feature_names(compiled)
+    if sparse and scipy is None:
+        raise ImportError("Sparse feature matrices require SciPy")
+
+    rows = (score_features(*_scan(compiled, str(text)), compiled) for text in texts)
+    if not sparse:
+        return np.array(list(rows), dtype=np.float32).reshape(-1, len(names)), names
+
+    data = []
+    indices = []
+    indptr = [0]
+    for row in rows:
+        nonzero = np.flatnonzero(row)
+        indices.append(nonzero.astype(np.int32))
+        data.append(row[nonzero])
+        indptr.append(indptr[-1] + len(nonzero))
+    matrix = scipy.sparse.csr_matrix(
+        (np.concatenate(data) if data else np.zeros(0, dtype=np.float32),
+         np.concatenate(indices) if indices else np.zeros(0, dtype=np.int32),
+         np.array(indptr, dtype=np.int64)),
+        shape=(len(indptr) - 1, len(names))
+    )
+    return matrix, names
@@ -0,0 +1,151 @@
+# ===============================
+# PATTERN REGISTRY
+# Versioned pattern tables loaded from JSON or YAML and validated up front
+# ===============================
+
+import json
+import math
+import os
+
+try:
+    import yaml  # optional; only needed for .yaml/.yml registries
+except ImportError:
+    yaml = None
+
+DEFAULT_REGISTRY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'patterns.json')
+
+# Tables every registry holds, in the order the engine uses them
+REGISTRY_TABLES = ('patterns', 'authenticity_patterns')
+REQUIRED_PATTERN_KEYS = ('name', 'description', 'indicators', 'weight')
+OPTIONAL_PATTERN_KEYS = ('whole_words',)
+
+# Constants of the overall score; a registry's optional `scoring` mapping
+# overrides any of them
+DEFAULT_SCORING = {
+    'multi_indicator_boost': 1.3,   # pattern score factor for two or more distinct indicators
+    'average_weight': 0.6,          # share of the mean detected pattern score in the risk
+    'max_weight': 0.4,              # share of the highest detected pattern score
+    'authenticity_discount': 0.5    # fraction of the authenticity score taken off the risk
+}
+
+
+class RegistryError(ValueError):
+    """Raised when a registry cannot be read or fails validation"""
+
+
+def _is_yaml(path):
+    return path.lower().endswith(('.yaml', '.yml'))
+
+
+def _pattern_problems(table, pattern_id, pattern):
+    where = f"{table}.{pattern_id}"
+    if not isinstance(pattern, dict):
+        return [f"{where}: must be a mapping"]
+
+    problems = [f"{where}: missing '{key}'" for key in REQUIRED_PATTERN_KEYS if key not in pattern]
+    unknown = set(pattern) - set(REQUIRED_PATTERN_KEYS) - set(OPTIONAL_PATTERN_KEYS)
+    problems += [f"{where}: unknown key '{key}'" for key in sorted(unknown)]
+
+    for key in ('name', 'description'):
+        if key in pattern and not isinstance(pattern[key], str):
+            problems.append(f"{where}.{key}: must be a string")
+
+    weight = pattern.get('weight')
+    if 'weight' in pattern and (isinstance(weight, bool) or not isinstance(weight, (int, float))
+                                or not math.isfinite(weight) or weight <= 0):
+        problems.append(f"{where}.weight: must be a positive number")
+
+    indicators = pattern.get('indicators')
+    if 'indicators' in pattern:
+        if not isinstance(indicators, list) or not indicators:
+            problems.append(f"{where}.indicators: must be a non-empty list")
+            indicators = []
+        seen = set()
+        for indicator in indicators:
+            if not isinstance(indicator, str) or not indicator.strip():
+                problems.append(f"{where}.indicators: {indicator!r} is not a non-blank string")
+            elif indicator.lower() in seen:
+                problems.append(f"{where}.indicators: {indicator!r} is listed twice")
+            else:
+                seen.add(indicator.lower())
+
+    whole_words = pattern.get('whole_words', [])
+    if not isinstance(whole_words, list):
+        problems.append(f"{where}.whole_words: must be a list")
+    elif isinstance(indicators, list):
+        problems += [
+            f"{where}.whole_words: {word!r} is not one of the indicators"
+            for word in whole_words if word not in indicators
+        ]
+    return problems
+
+
+def _scoring_problems(scoring):
+    if not isinstance(scoring, dict):
+        return ["scoring: must be a mapping"]
+    problems = [f"scoring: unknown key '{key}'" for key in sorted(set(scoring) - set(DEFAULT_SCORING))]
+    for key, value in scoring.items():
+        if key in DEFAULT_SCORING and (isinstance(value, bool) or not isinstance(value, (int, float))
+                                       or not math.isfinite(value) or value < 0):
+            problems.append(f"scoring.{key}: must be a non-negative number")
+    discount = scoring.get('authenticity_discount', 0)
+    if isinstance(discount, (int, float)) and discount > 1:
+        problems.append("scoring.authenticity_discount: must be at most 1")
+    return problems
+
+
+def validate_registry(registry):
+    """Check a parsed registry and return it; raises RegistryError listing every problem"""
+    if not isinstance(registry, dict):
+        raise RegistryError("Registry must be a mapping")
+
+    problems = []
+    if not isinstance(registry.get('version'), (int, str)) or isinstance(registry.get('version'), bool):
+        problems.append("version: must be an integer or string")
+    seen_ids = set()
+    for table in REGISTRY_TABLES:
+        patterns = registry.get(table)
+        if not isinstance(patterns, dict):
+            problems.append(f"{table}: must be a mapping of pattern id to pattern")
+            continue
+        for pattern_id, pattern in patterns.items():
+            if pattern_id in seen_ids:
+                problems.append(f"{table}.{pattern_id}: pattern id is already used")
+            seen_ids.add(pattern_id)
+            problems += _pattern_problems(table, pattern_id, pattern)
+    if 'scoring' in registry:
+        problems += _scoring_problems(registry['scoring'])
+
+    if problems:
+        raise RegistryError("Invalid pattern registry:\n  " + "\n  ".join(problems))
+    return registry
+
+
+def read_registry(path=DEFAULT_REGISTRY_PATH):
+    """Parse and validate the JSON or YAML registry at `path`"""
+    if _is_yaml(path) and yaml is None:
+        raise RegistryError(f"Reading {path} requires PyYAML")
+    errors = (OSError, ValueError) + ((yaml.YAMLError,) if yaml is not None else ())
+    try:
+        with open(path, encoding='utf-8') as f:
+            registry = yaml.safe_load(f) if _is_yaml(path) else json.load(f)
+    except errors as error:
+        raise RegistryError(f"Cannot read pattern registry {path}: {error}") from error
+    return validate_registry(registry)
+
+
+def write_registry(path, registry):
+    """Validate and write a registry atomically, so readers never see half a file"""
+    validate_registry(registry)
+    if _is_yaml(path) and yaml is None:
+        raise RegistryError(f"Writing {path} requires PyYAML")
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        if _is_yaml(path):
+            yaml.safe_dump(registry, f, allow_unicode=True, sort_keys=False)
+        else:
+            json.dump(registry, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
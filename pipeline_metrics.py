@@ -0,0 +1,244 @@
+# ===============================
+# PIPELINE METRICS
+# Stage timers, counters and histograms behind a pluggable sink
+# ===============================
+
+import bisect
+import json
+import threading
+import time
+
+# Upper bounds, in seconds, of the histogram buckets
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+# -------------------------------
+# SINKS
+# -------------------------------
+class MemorySink:
+    """Aggregates observations in process: counter totals and bucketed histograms"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.counters = {}        # (name, labels) -> total
+        self.histograms = {}      # (name, labels) -> [bucket counts, sum, count]
+
+    def increment(self, name, value, labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            histogram[0][bisect.bisect_left(self.buckets, value)] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def summary(self):
+        """One row per histogram: observation count, total and mean"""
+        with self._lock:
+            return [
+                {'metric': name, **dict(labels), 'count': count, 'total_s': total, 'mean_ms': total / count * 1000}
+                for (name, labels), (_, total, count) in sorted(self.histograms.items())
+            ]
+
+    def clear(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels_text(labels):
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}' if labels else ''
+
+
+class PrometheusSink(MemorySink):
+    """MemorySink that renders its contents in the Prometheus text format"""
+
+    def render(self):
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items())
+
+        typed = set()
+        for (name, labels), total in counters:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f'# TYPE {name} counter')
+            lines.append(f'{name}{_labels_text(labels)} {total}')
+
+        for (name, labels), (bucket_counts, total, count) in histograms:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f'# TYPE {name} histogram')
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), bucket_counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{_labels_text(labels + (("le", bound),))} {cumulative}')
+            lines.append(f'{name}_sum{_labels_text(labels)} {total}')
+            lines.append(f'{name}_count{_labels_text(labels)} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+class LogSink:
+    """Appends every observation to `path` as one JSON line"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8', buffering=1)
+
+    def _write(self, kind, name, value, labels):
+        line = json.dumps({'time': time.time(), 'type': kind, 'name': name, 'value': value, 'labels': labels})
+        with self._lock:
+            self._file.write(line + '\n')
+
+    def increment(self, name, value, labels):
+        self._write('counter', name, value, labels)
+
+    def observe(self, name, value, labels):
+        self._write('histogram', name, value, labels)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class EventBuffer:
+    """Holds raw observations until drained, for shipping between processes"""
+
+    def __init__(self):
+        self._events = []
+
+    def increment(self, name, value, labels):
+        self._events.append(('increment', name, value, labels))
+
+    def observe(self, name, value, labels):
+        self._events.append(('observe', name, value, labels))
+
+    def drain(self):
+        events, self._events = self._events, []
+        return events
+
+
+def sink_from_spec(spec):
+    """Sink for a flag value: 'memory', 'prometheus' or 'log:PATH'"""
+    if spec == 'memory':
+        return MemorySink()
+    if spec == 'prometheus':
+        return PrometheusSink()
+    if spec.startswith('log:') and spec[4:]:
+        return LogSink(spec[4:])
+    raise ValueError(f"Unknown metrics sink {spec!r}; expected 'memory', 'prometheus' or 'log:PATH'")
+
+# -------------------------------
+# RECORDER
+# -------------------------------
+class StageClock:
+    """Times consecutive stages; each call records the time since the previous one.
+
+    Calls take the `progress(stage, fraction)` signature, so a clock can
+    stand in for a progress callback, which it forwards to. A stage
+    reported with fraction 1 completes the run, as does `done()`.
+    """
+
+    def __init__(self, metrics, name, progress=None, labels=None):
+        self._metrics = metrics
+        self._name = name
+        self._progress = progress
+        self._labels = labels or {}
+        self._started = self._last = time.perf_counter()
+
+    def __call__(self, stage, fraction=None):
+        now = time.perf_counter()
+        self._metrics.observe(f'{self._name}_stage_seconds', now - self._last, stage=stage, **self._labels)
+        self._last = now
+        if self._progress is not None:
+            self._progress(stage, fraction)
+        if fraction == 1:
+            self.done()
+
+    def done(self):
+        self._metrics.observe(f'{self._name}_seconds', time.perf_counter() - self._started, **self._labels)
+        self._metrics.increment(f'{self._name}_total', **self._labels)
+
+
+class _NullClock:
+    def __call__(self, stage, fraction=None):
+        pass
+
+    def done(self):
+        pass
+
+
+_NULL_CLOCK = _NullClock()
+
+
+class PipelineMetrics:
+    """Entry point for instrumentation; does nothing until a sink is enabled.
+
+    Hot paths check `enabled` before building anything, so disabled
+    metrics cost one attribute lookup per call site. Worker processes get
+    their own copy: forked pool workers record into a copy of the parent's
+    sink, which only a LogSink makes visible.
+    """
+
+    def __init__(self):
+        self.sink = None
+        self.enabled = False
+
+    def enable(self, sink):
+        self.sink = sink
+        self.enabled = True
+
+    def disable(self):
+        self.sink = None
+        self.enabled = False
+
+    def increment(self, name, value=1, **labels):
+        if self.enabled:
+            self.sink.increment(name, value, labels)
+
+    def observe(self, name, value, **labels):
+        if self.enabled:
+            self.sink.observe(name, value, labels)
+
+    def replay(self, events):
+        """Feed events drained from an EventBuffer into this recorder's sink"""
+        if self.enabled:
+            for method, name, value, labels in events:
+                getattr(self.sink, method)(name, value, labels)
+
+    def stage_clock(self, name, progress=None, **labels):
+        """A StageClock, or a shared no-op clock while disabled.
+
+        The no-op clock drops `progress`, so callers that pass one check
+        `enabled` first.
+        """
+        return StageClock(self, name, progress, labels) if self.enabled else _NULL_CLOCK
+
+
+metrics = PipelineMetrics()
+
+
+def configure(spec):
+    """Enable the sink described by `spec` (see sink_from_spec); empty disables"""
+    if spec:
+        metrics.enable(sink_from_spec(spec))
+    else:
+        metrics.disable()
+    return metrics
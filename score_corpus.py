@@ -0,0 +1,234 @@
+# ===============================
+# HEADLESS CORPUS SCORER
+# Streams a JSONL or CSV corpus through the pattern engine
+# ===============================
+
+import argparse
+import csv
+import json
+import os
+import sys
+from contextlib import ExitStack
+from itertools import islice
+
+import numpy as np
+
+from pattern_engine import PatternRecognitionEngine
+from near_duplicates import NearDuplicateIndex
+
+
+# -------------------------------
+# INPUT READERS
+# -------------------------------
+def detect_format(path):
+    """Guess the corpus format from the file extension"""
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+
+def iter_jsonl_records(path):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_csv_records(path):
+    csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+    with open(path, newline='', encoding='utf-8') as f:
+        yield from csv.DictReader(f)
+
+
+def iter_records(path, fmt=None):
+    """Yield every record of a JSONL or CSV corpus as a dict"""
+    return iter_csv_records(path) if (fmt or detect_format(path)) == 'csv' else iter_jsonl_records(path)
+
+
+def iter_jsonl(path, text_field, id_field):
+    for index, record in enumerate(iter_jsonl_records(path)):
+        yield record.get(id_field, index), record.get(text_field) or ''
+
+
+def iter_csv(path, text_field, id_field):
+    for index, record in enumerate(iter_csv_records(path)):
+        yield record.get(id_field, index), record.get(text_field) or ''
+
+
+def iter_documents(path, fmt=None, text_field='text', id_field='id', skip=0):
+    """Yield (doc_id, text) pairs one at a time, skipping the first `skip`"""
+    reader = iter_csv if (fmt or detect_format(path)) == 'csv' else iter_jsonl
+    return islice(reader(path, text_field, id_field), skip, None)
+
+# -------------------------------
+# SCORING
+# -------------------------------
+def score_record(doc_id, results):
+    """Reduce a full analysis to the fields written per document"""
+    return {
+        'id': doc_id,
+        'overall_risk_score': results['overall_risk_score'],
+        'authenticity_score': results['authenticity_score'],
+        'pattern_count': results['pattern_count'],
+        'pattern_scores': {pid: p['score'] for pid, p in results['patterns_detected'].items()},
+        'pattern_hits': {pid: p['indicators_found'] for pid, p in results['patterns_detected'].items()},
+        'authenticity_patterns': {pid: p['score'] for pid, p in results['authenticity_patterns'].items()}
+    }
+
+
+def iter_scores(engine, documents, clusters=None):
+    """Score documents one at a time.
+
+    With a NearDuplicateIndex as `clusters`, near-duplicates reuse their
+    cluster's analysis and each record also carries `cluster_id` and the
+    cluster's size so far.
+    """
+    for doc_id, text in documents:
+        if clusters is None:
+            yield score_record(doc_id, engine.analyze_patterns(str(text)))
+            continue
+        results, cluster_id = clusters.analyze(str(text))
+        yield {**score_record(doc_id, results), 'cluster_id': cluster_id, 'cluster_size': clusters.sizes[cluster_id]}
+
+# -------------------------------
+# CHECKPOINTING
+# -------------------------------
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, checkpoint):
+    """Write the checkpoint atomically so a crash never leaves it half-written"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def open_at(path, offset):
+    """Open an output file for writing, cut back to its last checkpointed `offset`"""
+    f = open(path, 'r+b' if offset else 'wb')
+    f.seek(offset)
+    f.truncate()
+    return f
+
+
+def load_clusters(clusters, signatures_path, members_path, checkpoint):
+    """Restore a near-duplicate index from the files appended at each checkpoint"""
+    signatures = np.fromfile(signatures_path, dtype=np.uint64, count=checkpoint['clusters'] * clusters.num_perm)
+    members = np.fromfile(members_path, dtype=np.int64, count=checkpoint['members'])
+    clusters.restore(signatures.reshape(-1, clusters.num_perm), members)
+    clusters.reused = checkpoint['reused']
+
+
+def save_clusters(signatures_file, members_file, clusters, members, checkpoint):
+    """Append the clusters opened and documents assigned since the last checkpoint.
+
+    Both files only grow, so each checkpoint writes just the new entries;
+    a resumed run cuts them back to the lengths the checkpoint records.
+    """
+    signatures_file.write(np.asarray(clusters.signatures[checkpoint['clusters']:], dtype=np.uint64).tobytes())
+    members_file.write(np.asarray(members, dtype=np.int64).tobytes())
+    for f in (signatures_file, members_file):
+        f.flush()
+        os.fsync(f.fileno())
+    checkpoint.update(clusters=len(clusters), members=checkpoint['members'] + len(members), reused=clusters.reused)
+    members.clear()
+
+
+def score_corpus(input_path, output_path, fmt=None, text_field='text', id_field='id',
+                 checkpoint_path=None, checkpoint_every=1000, resume=False, engine=None,
+                 dedupe=False, threshold=0.8, cluster_sizes_path=None):
+    """Score a corpus into a JSONL file, resuming from the checkpoint if asked.
+
+    Output is flushed and the checkpoint advanced every `checkpoint_every`
+    documents. On resume the output is truncated back to the last
+    checkpointed offset, so records written after it are not duplicated.
+    With `dedupe`, near-duplicate documents are clustered (see
+    NearDuplicateIndex) and the index is checkpointed alongside; the
+    final cluster sizes can be written to `cluster_sizes_path`.
+    Returns the total number of documents scored.
+    """
+    engine = engine or PatternRecognitionEngine()
+    checkpoint_path = checkpoint_path or output_path + '.ckpt'
+    clusters_path = checkpoint_path + '.clusters'
+    members_path = checkpoint_path + '.members'
+    checkpoint = load_checkpoint(checkpoint_path) if resume and os.path.exists(output_path) else None
+    if checkpoint and checkpoint.get('input') != os.path.abspath(input_path):
+        raise ValueError(f"Checkpoint {checkpoint_path} belongs to {checkpoint.get('input')}")
+    checkpoint = checkpoint or {'input': os.path.abspath(input_path), 'processed': 0, 'output_offset': 0}
+
+    clusters = None
+    if dedupe:
+        clusters = NearDuplicateIndex(engine, threshold=threshold)
+        if checkpoint['processed'] and 'clusters' in checkpoint and os.path.exists(members_path):
+            load_clusters(clusters, clusters_path, members_path, checkpoint)
+        else:
+            checkpoint.update(clusters=0, members=0, reused=0)
+
+    with ExitStack() as files:
+        out = files.enter_context(open_at(output_path, checkpoint['output_offset']))
+        if clusters is not None:
+            signatures_file = files.enter_context(open_at(clusters_path, checkpoint['clusters'] * clusters.num_perm * 8))
+            members_file = files.enter_context(open_at(members_path, checkpoint['members'] * 8))
+            members = []
+
+        documents = iter_documents(input_path, fmt, text_field, id_field, skip=checkpoint['processed'])
+        for record in iter_scores(engine, documents, clusters):
+            out.write(json.dumps(record).encode('utf-8') + b'\n')
+            checkpoint['processed'] += 1
+            if clusters is not None:
+                members.append(record['cluster_id'])
+
+            if checkpoint['processed'] % checkpoint_every == 0:
+                out.flush()
+                os.fsync(out.fileno())
+                checkpoint['output_offset'] = out.tell()
+                if clusters is not None:
+                    save_clusters(signatures_file, members_file, clusters, members, checkpoint)
+                save_checkpoint(checkpoint_path, checkpoint)
+
+    if clusters is not None and cluster_sizes_path:
+        with open(cluster_sizes_path, 'w', encoding='utf-8') as f:
+            json.dump({'clusters': len(clusters), 'sizes': clusters.sizes}, f)
+    for path in (checkpoint_path, clusters_path, members_path):
+        if os.path.exists(path):
+            os.remove(path)
+    return checkpoint['processed']
+
+# -------------------------------
+# COMMAND LINE
+# -------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Score a JSONL or CSV corpus for disinformation patterns.')
+    parser.add_argument('input', help='JSONL or CSV corpus')
+    parser.add_argument('output', help='JSONL file receiving one scored record per document')
+    parser.add_argument('--format', choices=['jsonl', 'csv'], help='input format (default: from extension)')
+    parser.add_argument('--text-field', default='text', help='field holding the document text')
+    parser.add_argument('--id-field', default='id', help='field holding the document id')
+    parser.add_argument('--checkpoint', help='checkpoint file (default: OUTPUT.ckpt)')
+    parser.add_argument('--checkpoint-every', type=int, default=1000, help='documents between checkpoints')
+    parser.add_argument('--resume', action='store_true', help='continue from the checkpoint after a crash')
+    parser.add_argument('--dedupe', action='store_true',
+                        help='cluster near-duplicates and reuse their analyses; adds cluster_id/cluster_size')
+    parser.add_argument('--threshold', type=float, default=0.8, help='near-duplicate Jaccard similarity')
+    parser.add_argument('--cluster-sizes', help='with --dedupe, write final cluster sizes to this JSON file')
+    parser.add_argument('--registry', help='pattern registry file (default: patterns.json)')
+    args = parser.parse_args(argv)
+
+    total = score_corpus(
+        args.input, args.output, fmt=args.format, text_field=args.text_field,
+        id_field=args.id_field, checkpoint_path=args.checkpoint,
+        checkpoint_every=max(1, args.checkpoint_every), resume=args.resume,
+        dedupe=args.dedupe, threshold=args.threshold, cluster_sizes_path=args.cluster_sizes,
+        engine=PatternRecognitionEngine(args.registry)
+    )
+    print(f"Scored {total} documents -> {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,265 @@
+# ===============================
+# ASYNC SCORING SERVICE
+# HTTP front end for the pattern engine with micro-batching
+# ===============================
+#
+# Run with `python scoring_service.py --port 8080`. For tests, build the
+# app with create_app() and drive it in-process through
+# aiohttp.test_utils.TestClient(TestServer(app)).
+
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from aiohttp import web
+
+from pattern_engine import PatternRecognitionEngine
+from pipeline_metrics import EventBuffer, PrometheusSink, configure, metrics
+from score_corpus import score_record
+
+MAX_REQUEST_BYTES = 1024 * 1024
+MAX_BATCH_TEXTS = 1000
+
+
+class Overloaded(Exception):
+    """Raised when too many texts are already waiting to be scored"""
+
+# -------------------------------
+# WORKER PROCESSES
+# -------------------------------
+_service_engine = None
+
+
+def _init_service_worker(engine, collect_metrics=False):
+    global _service_engine
+    _service_engine = engine
+    # Workers buffer their observations and return them with each batch;
+    # a forked copy of the parent's sink would never be read
+    if collect_metrics:
+        metrics.enable(EventBuffer())
+    else:
+        metrics.disable()
+
+
+def _score_texts(texts):
+    """Scored records for `texts`, plus the metric events they produced"""
+    # Each worker holds its own engine, so each one checks the registry
+    # file for edits; one stat per batch
+    _service_engine.reload_if_changed()
+    records = [score_record(None, _service_engine.analyze_patterns(text)) for text in texts]
+    return records, metrics.sink.drain() if metrics.enabled else []
+
+# -------------------------------
+# MICRO-BATCHING
+# -------------------------------
+class MicroBatcher:
+    """Groups texts arriving within `window` seconds into one executor call.
+
+    At most `concurrency` batches run at once, and `submit` refuses new
+    texts once `max_pending` are queued or in flight, so the event loop
+    only ever waits on futures.
+    """
+
+    def __init__(self, executor, window=0.005, max_batch=64, max_pending=1024, concurrency=1):
+        self.executor = executor
+        self.window = window
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.pending = 0
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(concurrency)
+        self._tasks = set()
+        self._runner = None
+
+    def start(self):
+        self._runner = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._runner is not None:
+            self._runner.cancel()
+            await asyncio.gather(self._runner, *self._tasks, return_exceptions=True)
+
+    async def submit(self, text):
+        if self.pending >= self.max_pending:
+            raise Overloaded()
+        self.pending += 1
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((text, future))
+        try:
+            return await future
+        finally:
+            self.pending -= 1
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._slots.acquire()
+            task = loop.create_task(self._dispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch):
+        try:
+            texts = [text for text, _ in batch]
+            started = time.perf_counter()
+            results, events = await asyncio.get_running_loop().run_in_executor(self.executor, _score_texts, texts)
+            metrics.replay(events)
+            metrics.observe('service_batch_seconds', time.perf_counter() - started)
+        except Exception as error:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+        else:
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._slots.release()
+
+# -------------------------------
+# HTTP HANDLERS
+# -------------------------------
+async def read_json(request):
+    try:
+        return await request.json()
+    except ValueError:
+        raise web.HTTPBadRequest(text='Request body must be JSON')
+
+
+def overloaded_response():
+    return web.json_response({'error': 'Too many pending requests'}, status=503, headers={'Retry-After': '1'})
+
+
+async def score_one(request):
+    body = await read_json(request)
+    if not isinstance(body, dict) or not isinstance(body.get('text'), str):
+        raise web.HTTPBadRequest(text='Expected {"text": "..."}')
+    try:
+        record = await request.app['batcher'].submit(body['text'])
+    except Overloaded:
+        return overloaded_response()
+    return web.json_response({**record, 'id': body.get('id')})
+
+
+async def score_batch(request):
+    body = await read_json(request)
+    texts = body.get('texts') if isinstance(body, dict) else None
+    if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+        raise web.HTTPBadRequest(text='Expected {"texts": ["...", ...]}')
+    if len(texts) > request.app['max_batch_texts']:
+        raise web.HTTPRequestEntityTooLarge(max_size=request.app['max_batch_texts'], actual_size=len(texts))
+
+    ids = body.get('ids')
+    if ids is None:
+        ids = list(range(len(texts)))
+    elif not isinstance(ids, list) or len(ids) != len(texts):
+        raise web.HTTPBadRequest(text='"ids" must be a list with one id per text')
+    batcher = request.app['batcher']
+    if batcher.pending + len(texts) > batcher.max_pending:
+        return overloaded_response()
+    try:
+        records = await asyncio.gather(*(batcher.submit(text) for text in texts))
+    except Overloaded:
+        return overloaded_response()
+    return web.json_response({'results': [{**record, 'id': doc_id} for record, doc_id in zip(records, ids)]})
+
+
+async def health(request):
+    batcher = request.app['batcher']
+    engine = request.app['engine']
+    # Reloading may parse and compile a large registry, so it runs off the loop
+    await asyncio.get_running_loop().run_in_executor(None, engine.reload_if_changed)
+    return web.json_response({
+        'status': 'ok',
+        'pending': batcher.pending,
+        'fingerprint': engine.fingerprint,
+        'registry_version': engine.version,
+        'registry_error': engine.reload_error
+    })
+
+
+async def metrics_text(request):
+    if not isinstance(metrics.sink, PrometheusSink):
+        raise web.HTTPNotFound(text='Start the service with --metrics prometheus')
+    return web.Response(body=metrics.sink.render().encode('utf-8'),
+                        headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
+
+# -------------------------------
+# APPLICATION
+# -------------------------------
+def create_app(engine=None, workers=None, executor=None, window_ms=5, max_batch=64,
+               max_pending=1024, max_request_bytes=MAX_REQUEST_BYTES, max_batch_texts=MAX_BATCH_TEXTS):
+    """Build the scoring app; the worker pool starts and stops with the app.
+
+    Pass `executor` to supply a ready-made pool; it must run
+    `_init_service_worker(engine, metrics.enabled)` in each of its workers,
+    and `workers` should then give its size, which caps concurrent batches.
+    Enable metrics (pipeline_metrics.configure) before building the app.
+    """
+    engine = engine or PatternRecognitionEngine()
+    workers = workers or os.cpu_count() or 1
+    app = web.Application(client_max_size=max_request_bytes)
+    app['engine'] = engine
+    app['max_batch_texts'] = max_batch_texts
+
+    async def start_pool(app):
+        own_executor = executor is None
+        pool = executor or ProcessPoolExecutor(
+            workers, initializer=_init_service_worker, initargs=(engine, metrics.enabled)
+        )
+        app['executor'] = pool
+        app['owns_executor'] = own_executor
+        app['batcher'] = MicroBatcher(
+            pool, window=window_ms / 1000, max_batch=max_batch,
+            max_pending=max_pending, concurrency=workers
+        )
+        app['batcher'].start()
+
+    async def stop_pool(app):
+        await app['batcher'].stop()
+        if app['owns_executor']:
+            app['executor'].shutdown(cancel_futures=True)
+
+    app.on_startup.append(start_pool)
+    app.on_cleanup.append(stop_pool)
+    app.router.add_post('/score', score_one)
+    app.router.add_post('/score/batch', score_batch)
+    app.router.add_get('/health', health)
+    app.router.add_get('/metrics', metrics_text)
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the pattern engine over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, help='scoring processes (default: all cores)')
+    parser.add_argument('--window-ms', type=float, default=5, help='micro-batch collection window')
+    parser.add_argument('--max-pending', type=int, default=1024, help='queued texts before returning 503')
+    parser.add_argument('--registry', help='pattern registry file (default: patterns.json)')
+    parser.add_argument('--metrics', help="stage metrics sink: 'prometheus' (served at /metrics), "
+                                          "'memory' or 'log:PATH' (default: off)")
+    args = parser.parse_args(argv)
+    configure(args.metrics)
+    web.run_app(
+        create_app(PatternRecognitionEngine(args.registry), workers=args.workers,
+                   window_ms=args.window_ms, max_pending=args.max_pending),
+        host=args.host, port=args.port
+    )
+
+
+if __name__ == '__main__':
+    main()
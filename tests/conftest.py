@@ -0,0 +1,111 @@
+# ===============================
+# SHARED TEST FIXTURES
+# An engine whose registry exercises every matching rule, and mixed
+# ASCII/Unicode documents built from its indicators
+# ===============================
+
+import copy
+import json
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pattern_engine  # noqa: E402
+from pattern_engine import PatternRecognitionEngine  # noqa: E402
+from pattern_registry import DEFAULT_REGISTRY_PATH, read_registry  # noqa: E402
+
+# Indicators in other scripts, added to the shipped registry; those in the
+# second list are whole-word only
+EXTRA_INDICATORS = {
+    'urgency_creation': (['срочно', 'σκάνδαλο'], []),
+    'binary_narrative': (['ложь'], ['ложь']),
+    'source_obfuscation': (['говорят эксперты'], [])
+}
+
+LATIN_WORDS = ('the', 'report', 'said', 'people', 'know', 'snow', 'piano', 'antiviral', 'unverified',
+               'incomplete', 'forever', '100', '2024', 'ABCD', 'ñnow', 'viral_', 'über')
+OTHER_WORDS = ('новости', 'дня', 'канал', 'сегодня', 'правда', 'σήμερα', 'ειδήσεις', 'срочной')
+SEPARATORS = (' ', ' ', ' ', ' ', ', ', '. ', '! ', '?! ', '... ', '\n', '\n\n', '.\r\n', '\t', '_', '-', '')
+
+# Cyrillic and Ukrainian letters that pass for Latin ones
+LOOK_ALIKES = {'a': 'а', 'c': 'с', 'e': 'е', 'o': 'о', 'p': 'р', 'x': 'х', 'i': 'і'}
+
+
+def _disguise(indicator, rng):
+    """The indicator as written, or with one of the evasions fold_text undoes"""
+    choice = rng.randrange(7)
+    if choice == 0:
+        return indicator.upper()
+    if choice == 1:
+        return ''.join(LOOK_ALIKES.get(ch, ch) if rng.random() < 0.5 else ch for ch in indicator)
+    if choice == 2:
+        return '\u200b'.join(indicator)
+    if choice == 3:
+        return ''.join(chr(ord(ch) + 0xFEE0) if '!' <= ch <= '~' else ch for ch in indicator)
+    if choice == 4:
+        return indicator.replace("'", '’').replace('-', '‐')
+    return indicator
+
+
+def mixed_document(indicators, rng, words=40, other_share=None):
+    """Random text mixing indicators, their disguises and filler in several scripts.
+
+    Filler is mostly Latin or mostly Cyrillic and Greek, so documents fall
+    on both sides of the look-alike folding rule, and pieces are joined
+    with or without separators so whole-word edges are hit both ways.
+    """
+    other_share = rng.choice((0.0, 0.1, 0.9)) if other_share is None else other_share
+    pieces = []
+    for _ in range(words):
+        roll = rng.random()
+        if roll < 0.3:
+            pieces.append(_disguise(rng.choice(indicators), rng))
+        elif roll < 0.3 + 0.7 * other_share:
+            pieces.append(rng.choice(OTHER_WORDS))
+        else:
+            pieces.append(rng.choice(LATIN_WORDS))
+        pieces.append(rng.choice(SEPARATORS))
+    return ''.join(pieces)
+
+
+def plain(results):
+    """Results with the sentence risk array as a list, so two runs compare with =="""
+    return {**results, 'sentence_risk': list(results.get('sentence_risk', ()))}
+
+
+@pytest.fixture(scope='session')
+def registry_path(tmp_path_factory):
+    registry = copy.deepcopy(read_registry(DEFAULT_REGISTRY_PATH))
+    for pattern_id, (indicators, whole_words) in EXTRA_INDICATORS.items():
+        pattern = registry['patterns'][pattern_id]
+        pattern['indicators'] = list(pattern['indicators']) + indicators
+        pattern['whole_words'] = list(pattern.get('whole_words', ())) + whole_words
+    path = tmp_path_factory.mktemp('registry') / 'patterns.json'
+    path.write_text(json.dumps(registry, ensure_ascii=False), encoding='utf-8')
+    return str(path)
+
+
+@pytest.fixture(scope='session', params=['automaton', 'tables'])
+def engine(request, registry_path):
+    """The extended registry on pyahocorasick, when installed, and on the pure-Python tables"""
+    with pytest.MonkeyPatch.context() as patch:
+        if request.param == 'tables':
+            patch.setattr(pattern_engine, 'ahocorasick', None)
+        yield PatternRecognitionEngine(registry_path)
+
+
+@pytest.fixture(scope='session')
+def indicators(engine):
+    return [indicator for _, indicator, _ in engine.matcher.keywords]
+
+
+@pytest.fixture(scope='session')
+def documents(indicators):
+    rng = random.Random(2024)
+    return ['', 'hello', 'NOW. ' * 3, 'Срочно! Новости дня', 'The channel posted: срочно, share this!'] + [
+        mixed_document(indicators, rng, words=rng.choice((5, 40, 200))) for _ in range(60)
+    ]
@@ -0,0 +1,84 @@
+import random
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis_history import RISK_BANDS, RISK_BIN_LABELS, RISK_BINS, AnalysisHistory
+
+PATTERN_IDS = [f'pattern_{i}' for i in range(70)]
+
+
+def random_entries(rng, count):
+    """Appends with risks on and around every bin and band edge"""
+    edges = [0.0, 0.2, 0.4, 0.6, 0.7, 0.8, 1.0]
+    for step in range(count):
+        roll = rng.random()
+        if roll < 0.3:
+            risk = rng.choice(edges)
+        elif roll < 0.4:
+            risk = np.nextafter(np.float32(rng.choice(edges)), np.float32(rng.choice((-1, 2))))
+        else:
+            risk = rng.random()
+        patterns = rng.sample(PATTERN_IDS, rng.choice((0, 1, 3, 10, 70)))
+        if rng.random() < 0.1:
+            patterns.append('not_in_registry')
+        yield dict(overall_risk=float(risk), patterns_detected=patterns, word_count=rng.randrange(5000),
+                   text_preview=f'text {step}', timestamp=1_700_000_000 + step)
+
+
+def check_against_entries(history, kept):
+    """Every summary of `history` recomputed from the entries it should retain"""
+    risks = np.array([entry['overall_risk'] for entry in kept], dtype=np.float32)
+    assert len(history) == len(kept)
+    assert history.mean_risk() == pytest.approx(float(risks.astype(np.float64).mean()) if kept else 0.0)
+    assert history.max_risk() == (float(risks.max()) if kept else 0.0)
+    assert history.mean_pattern_count() == pytest.approx(
+        np.mean([len(entry['patterns_detected']) for entry in kept]) if kept else 0.0)
+
+    bands = [0 if risk < 0.4 else 2 if risk > 0.7 else 1 for risk in risks.tolist()]
+    assert history.risk_band_counts() == {name: bands.count(i) for i, name in enumerate(RISK_BANDS)}
+    assert history.high_risk_count() == bands.count(2)
+    bins = pd.cut(risks, bins=RISK_BINS, labels=RISK_BIN_LABELS).value_counts()
+    assert history.risk_bin_counts() == {label: int(bins[label]) for label in RISK_BIN_LABELS}
+
+    counts = Counter(p for entry in kept for p in entry['patterns_detected'] if p in PATTERN_IDS)
+    frequency = history.pattern_frequency()
+    assert dict(frequency) == counts
+    assert frequency == sorted(frequency, key=lambda pair: (-pair[1], PATTERN_IDS.index(pair[0])))
+    assert history.pattern_frequency(top=3) == frequency[:3]
+
+
+def test_aggregates_match_recomputation():
+    rng = random.Random(12)
+    capacity = 37
+    history = AnalysisHistory(PATTERN_IDS, capacity=capacity)
+    appended = []
+    for entry in random_entries(rng, 12 * capacity):
+        history.append(**entry)
+        appended.append(entry)
+        check_against_entries(history, appended[-capacity:])
+
+    history.clear()
+    check_against_entries(history, [])
+
+
+def test_rows_match_retained_entries():
+    rng = random.Random(13)
+    history = AnalysisHistory(PATTERN_IDS, capacity=50)
+    appended = list(random_entries(rng, 130))
+    for entry in appended:
+        history.append(**entry)
+    kept = appended[-50:]
+
+    frame = history.to_frame()
+    assert frame['text_preview'].tolist() == [entry['text_preview'] for entry in kept]
+    assert frame['word_count'].tolist() == [entry['word_count'] for entry in kept]
+    np.testing.assert_array_equal(frame['overall_risk'], np.float32([entry['overall_risk'] for entry in kept]))
+    assert frame['patterns_detected'].tolist() == [
+        [p for p in PATTERN_IDS if p in entry['patterns_detected']] for entry in kept
+    ]
+    assert frame['pattern_count'].tolist() == [len(entry['patterns_detected']) for entry in kept]
+    pd.testing.assert_frame_equal(pd.concat(history.iter_frames(chunk_size=7), ignore_index=True), frame)
+    assert [entry['text_preview'] for entry in history.recent(5)] == [entry['text_preview'] for entry in kept[-5:]]
@@ -0,0 +1,84 @@
+import itertools
+import random
+
+import pytest
+
+from analysis_history import RISK_BANDS, risk_band
+from analysis_store import AnalysisStore
+
+PATTERN_IDS = ['urgency_creation', 'binary_narrative', 'source_obfuscation', 'emotional_manipulation']
+START = 1_700_000_000
+
+
+@pytest.fixture(scope='module')
+def filled_store(tmp_path_factory):
+    """A store of random analyses, many sharing a timestamp, and the same rows as dicts"""
+    rng = random.Random(13)
+    store = AnalysisStore(str(tmp_path_factory.mktemp('store') / 'analyses.db'))
+    rows = []
+    timestamp = START
+    for step in range(700):
+        # Runs of equal timestamps, so pages are cut between ties
+        timestamp += rng.choice((0, 0, 0, 1, 60))
+        risk = rng.choice((0.0, 0.4, 0.7, 1.0, rng.random()))
+        patterns = rng.sample(PATTERN_IDS, rng.randrange(len(PATTERN_IDS) + 1))
+        results = {'overall_risk_score': risk, 'authenticity_score': rng.random(), 'pattern_count': len(patterns),
+                   'text_metrics': {'word_count': rng.randrange(1000)}, 'patterns_detected': patterns}
+        analysis_id = store.add(results, f'text {step}', timestamp=timestamp)
+        rows.append({'id': analysis_id, 'timestamp': timestamp, 'risk_band': risk_band(risk), 'patterns': set(patterns)})
+    yield store, rows
+    store.close()
+
+
+FILTERS = [
+    dict(risk_band=band, pattern_id=pattern, since=since, until=until)
+    for band, pattern, since, until in itertools.product(
+        (None, 'Low', 'High', 1), (None, 'urgency_creation', 'source_obfuscation'),
+        (None, START + 3000), (None, START + 6000)
+    )
+]
+
+
+def expected_ids(rows, risk_band=None, pattern_id=None, since=None, until=None):
+    """Matching ids, newest first, by a scan over every stored row"""
+    if isinstance(risk_band, str):
+        risk_band = RISK_BANDS.index(risk_band)
+    matching = [
+        row for row in rows
+        if (risk_band is None or row['risk_band'] == risk_band)
+        and (pattern_id is None or pattern_id in row['patterns'])
+        and (since is None or row['timestamp'] >= since)
+        and (until is None or row['timestamp'] < until)
+    ]
+    return [row['id'] for row in sorted(matching, key=lambda row: (row['timestamp'], row['id']), reverse=True)]
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_pages_return_every_row_once_newest_first(filled_store, filters):
+    store, rows = filled_store
+    expected = expected_ids(rows, **filters)
+    assert store.count(**filters) == len(expected)
+
+    for page_size in (1, 7, 1000):
+        pages = list(store.iter_pages(**filters, page_size=page_size))
+        assert all(0 < len(page) <= page_size for page in pages)
+        assert [row['id'] for page in pages for row in page] == expected
+
+    # Seeking by cursor and skipping by offset give the same pages
+    before = None
+    for offset in range(0, len(expected) + 13, 13):
+        page = store.query(**filters, limit=13, before=before)
+        assert page == store.query(**filters, limit=13, offset=offset)
+        assert [row['id'] for row in page] == expected[offset:offset + 13]
+        if page:
+            before = (page[-1]['timestamp'], page[-1]['id'])
+
+
+def test_rows_carry_their_patterns(filled_store):
+    store, rows = filled_store
+    by_id = {row['id']: row for row in rows}
+    for page in store.iter_pages(page_size=100):
+        for row in page:
+            stored = by_id[row['id']]
+            assert set(row['patterns_detected']) == stored['patterns']
+            assert (row['timestamp'], row['risk_band']) == (stored['timestamp'], stored['risk_band'])
@@ -0,0 +1,37 @@
+import random
+
+from pattern_engine import IncrementalAnalyzer
+
+from conftest import mixed_document, plain
+
+
+def edits(text, rng, steps=25):
+    """Successive versions of `text`, as a user might type, paste and delete"""
+    for _ in range(steps):
+        cut = rng.randrange(len(text) + 1)
+        action = rng.randrange(4)
+        if action == 0:
+            text += rng.choice(('. ', '! ', '\n', ' ')) + rng.choice(('NOW', 'срочно', 'they say', 'ложь'))
+        elif action == 1:
+            text = text[:cut] + rng.choice(('. ', 'x', 'ВСЁ ', '.\n', '')) + text[cut:]
+        elif action == 2:
+            text = text[:cut] + text[cut + rng.randrange(1, 40):]
+        else:
+            # Enough other-script filler to flip the look-alike folding rule
+            text += ' ' + ' '.join(['новости дня'] * rng.randrange(1, 30)) + '.'
+        yield text
+
+
+def test_incremental_matches_full_analysis(engine, indicators):
+    rng = random.Random(8)
+    analyzer = IncrementalAnalyzer(engine)
+    assert analyzer.exact
+    for _ in range(6):
+        for text in edits(mixed_document(indicators, rng), rng):
+            assert plain(analyzer.analyze(text)) == plain(engine.analyze_patterns(text))
+
+
+def test_incremental_matches_on_unrelated_documents(engine, documents):
+    analyzer = IncrementalAnalyzer(engine)
+    for text in documents:
+        assert plain(analyzer.analyze(text)) == plain(engine.analyze_patterns(text))
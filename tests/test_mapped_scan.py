@@ -0,0 +1,38 @@
+import random
+
+import pytest
+
+from mapped_scan import analyze_file
+
+from conftest import mixed_document
+
+
+def aggregates(results):
+    """Everything analyze_file reports; it leaves out the per-sentence timeline"""
+    return {key: value for key, value in results.items() if key not in ('timeline_analysis', 'sentence_risk')}
+
+
+@pytest.fixture(scope='module')
+def corpus_file(tmp_path_factory, indicators):
+    rng = random.Random(20)
+    text = '\n'.join(mixed_document(indicators, rng, words=300) for _ in range(12))
+    # An indicator stretched by invisible characters across several windows,
+    # and a long run without whitespace to cut through
+    text += ' s' + '\u200b' * 300 + 'hocking news ' + 'NOSPACE' * 500 + ' the end.\r\n'
+    path = tmp_path_factory.mktemp('mapped') / 'corpus.txt'
+    path.write_bytes(text.encode('utf-8'))
+    return path, text
+
+
+@pytest.mark.parametrize('window_bytes', [1, 7, 64, 1000, 1 << 20])
+def test_windows_match_full_analysis(engine, corpus_file, window_bytes):
+    path, text = corpus_file
+    assert aggregates(analyze_file(engine, str(path), window_bytes)) == aggregates(engine.analyze_patterns(text))
+
+
+@pytest.mark.parametrize('window_bytes', [16, 256])
+def test_windows_match_on_each_document(engine, documents, tmp_path, window_bytes):
+    path = tmp_path / 'document.txt'
+    for text in documents:
+        path.write_bytes(text.encode('utf-8'))
+        assert aggregates(analyze_file(engine, str(path), window_bytes)) == aggregates(engine.analyze_patterns(text))
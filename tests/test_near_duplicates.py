@@ -0,0 +1,61 @@
+import pickle
+import random
+
+import numpy as np
+
+from near_duplicates import NearDuplicateIndex
+
+from conftest import plain
+
+
+def short_posts(rng, count):
+    """Distinct posts of 8-25 words, the length of a tweet"""
+    vocabulary = ['word%d' % i for i in range(5000)]
+    return [' '.join(rng.choice(vocabulary) for _ in range(rng.randint(8, 25))) for _ in range(count)]
+
+
+def candidates(index, text):
+    """The clusters an LSH lookup of `text` would compare against"""
+    keys = index._keys(index.signature(text))
+    return {cluster for bucket, key in zip(index._buckets, keys) if key is not None
+            for cluster in bucket.get(key, ())}
+
+
+def test_short_texts_keep_candidates_bounded(engine):
+    index = NearDuplicateIndex(engine)
+    posts = short_posts(random.Random(17), 3000)
+    total = 0
+    for text in posts:
+        total += len(candidates(index, text))
+        index.assign(text)
+    assert len(index) == len(posts)
+    # Unrelated posts share no bucket; all-empty bands would make it every cluster
+    assert total <= len(posts)
+
+
+def test_edited_copies_join_their_cluster(engine):
+    rng = random.Random(18)
+    index = NearDuplicateIndex(engine, threshold=0.5)
+    originals = short_posts(rng, 200)
+    clusters = [index.assign(text) for text in originals]
+    for text, cluster in zip(originals, clusters):
+        assert index.assign(text) == cluster
+        assert index.assign(text + ' ' + 'extra') == cluster
+    assert len(index) == len(originals)
+    assert index.assign('') == index.assign('')
+
+
+def test_analysis_matches_and_restores(engine, documents):
+    index = NearDuplicateIndex(engine)
+    members = []
+    for text in documents + documents[::-1]:
+        results, cluster = index.analyze(text)
+        members.append(cluster)
+        assert plain(results) == plain(engine.analyze_patterns(text))
+    assert index.reused >= len(documents)
+
+    restored = NearDuplicateIndex(engine)
+    restored.restore(index.signatures, np.array(members))
+    assert restored.sizes == index.sizes
+    assert [restored.assign(text) for text in documents] == [index.assign(text) for text in documents]
+    assert pickle.loads(pickle.dumps(index)).signatures[0].tobytes() == index.signatures[0].tobytes()
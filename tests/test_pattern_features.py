@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from pattern_features import METRIC_FEATURES, analyze_features, feature_matrix, feature_names
+
+from conftest import plain
+
+
+def expected_vector(results, compiled):
+    """The scores, summary and metric features read back from analyze_patterns results"""
+    pattern_ids = [*compiled.patterns, *compiled.authenticity_patterns]
+    scores = {pattern_id: entry['score'] for table in ('patterns_detected', 'authenticity_patterns')
+              for pattern_id, entry in results[table].items()}
+    return np.array(
+        [scores.get(pattern_id, 0.0) for pattern_id in pattern_ids]
+        + [results['overall_risk_score'], results['authenticity_score'], results['pattern_count']]
+        + [results['text_metrics'][name] for name in METRIC_FEATURES],
+        dtype=np.float32
+    )
+
+
+def test_features_match_full_analysis(engine, documents):
+    compiled = engine.compiled
+    n_tables = len(compiled.patterns) + len(compiled.authenticity_patterns)
+    for text in documents:
+        features = analyze_features(text, engine)
+        results = engine.analyze_patterns(text)
+        assert plain(features.results()) == plain(results)
+
+        assert len(features.vector) == len(feature_names(compiled))
+        counts = features.vector[:n_tables]
+        np.testing.assert_array_equal(features.vector[n_tables:], expected_vector(results, compiled))
+        detected = [pattern_id in results['patterns_detected'] or pattern_id in results['authenticity_patterns']
+                    for pattern_id in [*compiled.patterns, *compiled.authenticity_patterns]]
+        np.testing.assert_array_equal(counts > 0, detected)
+
+
+def test_feature_matrix_rows_match_single_documents(engine, documents):
+    matrix, names = feature_matrix(documents, engine)
+    assert matrix.dtype == np.float32
+    assert names == feature_names(engine.compiled)
+    for text, row in zip(documents, matrix):
+        np.testing.assert_array_equal(row, analyze_features(text, engine).vector)
+
+
+def test_sparse_matrix_matches_dense(engine, documents):
+    pytest.importorskip('scipy')
+    dense, _ = feature_matrix(documents, engine)
+    sparse, _ = feature_matrix(documents, engine, sparse=True)
+    np.testing.assert_array_equal(sparse.toarray(), dense)
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from pattern_columnar import score_text_column
+from weight_calibration import pattern_counts, predict_risk
+
+
+def test_column_scores_match_full_analysis(engine, documents):
+    compiled = engine.compiled
+    frame = score_text_column(pd.Series(documents), engine)
+    for (_, row), text in zip(frame.iterrows(), documents):
+        results = engine.analyze_patterns(text)
+        scores = {pattern_id: entry['score'] for table in ('patterns_detected', 'authenticity_patterns')
+                  for pattern_id, entry in results[table].items()}
+        for pattern_id in [*compiled.patterns, *compiled.authenticity_patterns]:
+            assert row[pattern_id] == scores.get(pattern_id, 0.0)
+        assert row['pattern_count'] == results['pattern_count']
+        assert row['overall_risk_score'] == results['overall_risk_score']
+        assert row['authenticity_score'] == results['authenticity_score']
+
+
+def test_calibration_model_matches_full_analysis(engine, documents):
+    compiled = engine.compiled
+    counts, multi = pattern_counts(documents, compiled)
+    weights = [pattern['weight'] for table in (compiled.patterns, compiled.authenticity_patterns)
+               for pattern in table.values()]
+    risk = predict_risk(counts, multi, weights, compiled.scoring)
+    np.testing.assert_array_equal(risk, [engine.analyze_patterns(text)['overall_risk_score'] for text in documents])
@@ -0,0 +1,119 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+test_utils = pytest.importorskip('aiohttp.test_utils')
+
+from score_corpus import score_record  # noqa: E402
+from scoring_service import _init_service_worker, create_app  # noqa: E402
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    """Scores in threads of this process and records every batch it is handed.
+
+    Batches wait for `gate` to open, so tests can hold texts in flight.
+    """
+
+    def __init__(self, engine, workers=2):
+        super().__init__(workers, initializer=_init_service_worker, initargs=(engine, False))
+        self.batches = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def submit(self, fn, *args, **kwargs):
+        self.batches.append(list(args[0]))
+        gate = self.gate
+
+        def gated():
+            gate.wait()
+            return fn(*args, **kwargs)
+        return super().submit(gated)
+
+
+def serve(engine, scenario, **options):
+    """Run `scenario(client, executor)` against an in-process app"""
+    executor = CountingExecutor(engine)
+
+    async def run():
+        app = create_app(engine, workers=2, executor=executor, **options)
+        async with test_utils.TestClient(test_utils.TestServer(app)) as client:
+            return await scenario(client, executor)
+    try:
+        return asyncio.run(run())
+    finally:
+        executor.gate.set()
+        executor.shutdown()
+
+
+def expected(engine, text, doc_id):
+    """The record the service should return, as it reads back from JSON"""
+    return json.loads(json.dumps(score_record(doc_id, engine.analyze_patterns(text))))
+
+
+def test_scores_match_analysis(engine, documents):
+    async def scenario(client, executor):
+        for doc_id, text in enumerate(documents[:20]):
+            response = await client.post('/score', json={'text': text, 'id': doc_id})
+            assert response.status == 200
+            assert await response.json() == expected(engine, text, doc_id)
+
+        ids = [f'd{i}' for i in range(len(documents))]
+        response = await client.post('/score/batch', json={'texts': documents, 'ids': ids})
+        assert response.status == 200
+        results = (await response.json())['results']
+        assert results == [expected(engine, text, doc_id) for text, doc_id in zip(documents, ids)]
+
+        response = await client.post('/score/batch', json={'texts': documents[:3]})
+        assert [record['id'] for record in (await response.json())['results']] == [0, 1, 2]
+    serve(engine, scenario)
+
+
+def test_rejects_bad_requests(engine):
+    async def scenario(client, executor):
+        for path, body in [('/score', 'not json'), ('/score/batch', '{"texts": ')]:
+            assert (await client.post(path, data=body)).status == 400
+        for body in [{'texts': ['a', 'b', 'c'], 'ids': ['x', 'y']}, {'texts': ['a'], 'ids': 'x'},
+                     {'texts': 'a'}, {'texts': ['a', 1]}]:
+            assert (await client.post('/score/batch', json=body)).status == 400
+        assert (await client.post('/score', json={'text': 5})).status == 400
+
+        assert (await client.post('/score', json={'text': 'x' * 5000})).status == 413
+        assert (await client.post('/score/batch', json={'texts': ['a'] * 21})).status == 413
+        assert (await client.post('/score/batch', json={'texts': ['a'] * 20})).status == 200
+        assert executor.batches and all(len(batch) <= 20 for batch in executor.batches)
+    serve(engine, scenario, max_request_bytes=2000, max_batch_texts=20)
+
+
+def test_overload_returns_retry_after(engine):
+    async def scenario(client, executor):
+        batcher = client.server.app['batcher']
+        executor.gate.clear()
+        held = [asyncio.ensure_future(client.post('/score', json={'text': f'NOW {i}'})) for i in range(3)]
+        while batcher.pending < 3:
+            await asyncio.sleep(0.01)
+
+        for path, body in [('/score', {'text': 'one more'}), ('/score/batch', {'texts': ['a']})]:
+            response = await client.post(path, json=body)
+            assert response.status == 503
+            assert response.headers['Retry-After'] == '1'
+
+        executor.gate.set()
+        assert [response.status for response in await asyncio.gather(*held)] == [200, 200, 200]
+        assert (await client.post('/score/batch', json={'texts': ['a', 'b', 'c']})).status == 200
+        assert (await client.post('/score/batch', json={'texts': ['a', 'b', 'c', 'd']})).status == 503
+    serve(engine, scenario, max_pending=3)
+
+
+def test_concurrent_texts_share_one_batch(engine):
+    texts = [f'Text {i}: SHOCKING news, act NOW!' for i in range(6)]
+
+    async def scenario(client, executor):
+        responses = await asyncio.gather(*(client.post('/score', json={'text': text}) for text in texts))
+        assert [response.status for response in responses] == [200] * len(texts)
+        assert [await response.json() for response in responses] == [expected(engine, text, None) for text in texts]
+        assert len(executor.batches) == 1
+        assert sorted(executor.batches[0]) == sorted(texts)
+    serve(engine, scenario, window_ms=500)
@@ -0,0 +1,48 @@
+import random
+
+import pytest
+
+import pattern_engine
+from pattern_engine import ANALYSIS_STAGES, shard_spans, split_segments
+
+from conftest import mixed_document, plain
+
+
+@pytest.fixture
+def small_shards(monkeypatch):
+    """Shard documents of a few thousand characters, so the tests stay fast"""
+    monkeypatch.setattr(pattern_engine, 'SHARD_MIN_CHARS', 500)
+
+
+@pytest.fixture(scope='module')
+def long_documents(indicators):
+    rng = random.Random(24)
+    return [
+        ' '.join(mixed_document(indicators, rng, words=200, other_share=share) for _ in range(count))
+        for share in (0.0, 0.1, 0.9) for count in (2, 8)
+    ]
+
+
+@pytest.mark.parametrize('count', [1, 2, 3, 4, 7, 50])
+def test_shards_cut_at_segment_boundaries(documents, long_documents, count):
+    for text in documents + long_documents + ['abc. def', 'abc. ', 'no delimiters at all', '.\n\n.']:
+        spans = shard_spans(text, count)
+        assert len(spans) <= max(1, count)
+        assert [start for start, _ in spans[1:]] == [end for _, end in spans[:-1]]
+        shards = [text[start:end] for start, end in spans]
+        assert ''.join(shards) == text
+        assert [segment for shard in shards for segment in split_segments(shard)] == split_segments(text)
+
+
+@pytest.mark.parametrize('workers', [2, 3, 4])
+def test_sharded_analysis_matches_sequential(engine, long_documents, small_shards, workers):
+    assert engine.compiled.segment_exact
+    for text in long_documents:
+        assert len(text) >= 2 * pattern_engine.SHARD_MIN_CHARS
+        assert plain(engine.analyze_patterns(text, workers=workers)) == plain(engine.analyze_patterns(text))
+
+
+def test_sharded_analysis_reports_every_stage(engine, long_documents, small_shards):
+    stages = []
+    engine.analyze_patterns(long_documents[-1], progress=lambda stage, fraction: stages.append(stage), workers=2)
+    assert stages == list(ANALYSIS_STAGES)
@@ -0,0 +1,184 @@
+# ===============================
+# TEXT NORMALIZATION
+# One-pass Unicode folding of text before indicator matching
+# ===============================
+
+import functools
+import string
+import unicodedata
+from collections import namedtuple
+
+import numpy as np
+
+# Part of the compiled pattern fingerprint; bump whenever folding changes
+# what a text matches, so cached analyses are not reused across versions
+NORMALIZATION_VERSION = 2
+
+# Latin look-alikes from other scripts, folded only in text that is mostly
+# Latin (see folds_confusables). Both cases are listed, since a capital and
+# its lowercase form can imitate different Latin letters.
+CONFUSABLES = {
+    # Cyrillic
+    'А': 'A', 'В': 'B', 'С': 'C', 'Е': 'E', 'Н': 'H', 'І': 'I', 'Ј': 'J', 'К': 'K', 'М': 'M',
+    'О': 'O', 'Р': 'P', 'Ѕ': 'S', 'Т': 'T', 'Х': 'X', 'Ү': 'Y', 'Ԛ': 'Q', 'Ԝ': 'W', 'Ӏ': 'l',
+    'а': 'a', 'с': 'c', 'ԁ': 'd', 'е': 'e', 'һ': 'h', 'і': 'i', 'ј': 'j', 'к': 'k', 'ӏ': 'l',
+    'о': 'o', 'р': 'p', 'ԛ': 'q', 'ѕ': 's', 'ѵ': 'v', 'ԝ': 'w', 'х': 'x', 'у': 'y', 'ү': 'y',
+    # Greek
+    'Α': 'A', 'Β': 'B', 'Ε': 'E', 'Ζ': 'Z', 'Η': 'H', 'Ι': 'I', 'Κ': 'K', 'Μ': 'M', 'Ν': 'N',
+    'Ο': 'O', 'Ρ': 'P', 'Τ': 'T', 'Υ': 'Y', 'Χ': 'X',
+    'α': 'a', 'ι': 'i', 'κ': 'k', 'ν': 'v', 'ο': 'o', 'ρ': 'p', 'τ': 't', 'υ': 'u', 'χ': 'x',
+    # Latin letters outside ASCII
+    'ɡ': 'g', 'ı': 'i', 'ȷ': 'j'
+}
+
+# Quotes and dashes that stand in for their ASCII forms
+PUNCTUATION = {
+    '‘': "'", '’': "'", '‚': "'", '‛': "'", '′': "'", 'ʹ': "'", 'ʼ': "'", 'ˈ': "'",
+    '“': '"', '”': '"', '„': '"', '‟': '"', '″': '"', '«': '"', '»': '"', '〝': '"', '〞': '"',
+    '−': '-', '﹘': '-'
+}
+
+# Invisible characters outside the Cf category that are stripped as well:
+# combining grapheme joiner, Hangul fillers, Mongolian and other variation
+# selectors
+IGNORABLE_RANGES = (
+    (0x034F, 0x034F), (0x115F, 0x1160), (0x17B4, 0x17B5), (0x180B, 0x180D), (0x3164, 0x3164),
+    (0xFE00, 0xFE0F), (0xFFA0, 0xFFA0), (0xE0100, 0xE01EF)
+)
+
+# Code points below this are folded through a lookup array; the rest are
+# rare enough to look up one by one
+TABLE_LIMIT = 0x30000
+IRREGULAR = 0xFFFFFFFF
+
+_NON_LETTER_BYTES = bytes(b for b in range(256) if chr(b) not in string.ascii_letters)
+# Every byte below 0xC0 is ASCII or a UTF-8 continuation byte
+_NON_LEAD_BYTES = bytes(range(0xC0))
+
+
+class FoldedText(namedtuple('FoldedText', ['text', 'offsets'])):
+    """Folded text, with the original index of each of its characters.
+
+    `offsets` is None when every character folded to exactly one, and
+    otherwise an int64 array as long as `text`.
+    """
+
+    __slots__ = ()
+
+    def spans(self, starts, ends):
+        """Map arrays of [start, end) spans in `text` to spans in the original"""
+        if self.offsets is None:
+            return starts, ends
+        return self.offsets[starts], self.offsets[ends - 1] + 1
+
+
+def _is_ignorable(ch):
+    code = ord(ch)
+    return unicodedata.category(ch) == 'Cf' or any(low <= code <= high for low, high in IGNORABLE_RANGES)
+
+
+def _fold_char(ch, confusables):
+    """Folded form of one character: NFKC, look-alikes, lowercase, quotes and dashes, invisibles removed"""
+    folded = unicodedata.normalize('NFKC', ch)
+    if confusables:
+        folded = ''.join(CONFUSABLES.get(c, c) for c in folded)
+    # Lowercasing can leave characters NFKC would change again; a final
+    # sigma folds like any other, as it does under str.casefold
+    folded = unicodedata.normalize('NFKC', folded.lower()).replace('ς', 'σ')
+    return ''.join(
+        '' if _is_ignorable(c) else '-' if unicodedata.category(c) == 'Pd' else PUNCTUATION.get(c, c)
+        for c in folded
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _candidates():
+    """Every character that might not fold to itself; all others are left alone"""
+    chars = {*CONFUSABLES, *PUNCTUATION, 'ς'}
+    chars.update(chr(code) for low, high in IGNORABLE_RANGES for code in range(low, high + 1))
+    for code in range(0x110000):
+        ch = chr(code)
+        category = unicodedata.category(ch)
+        if category in ('Cn', 'Co', 'Cs'):
+            continue
+        if category in ('Cf', 'Pd') or ch.lower() != ch or not unicodedata.is_normalized('NFKC', ch):
+            chars.add(ch)
+    return sorted(chars)
+
+
+@functools.lru_cache(maxsize=None)
+def _tables(confusables):
+    """Folding tables, built once per process on first use.
+
+    `table` maps each code point that changes to its folded string. `codes`
+    is the same table as a code point lookup array up to TABLE_LIMIT, for
+    characters that fold to exactly one character; every other entry, and
+    the one at TABLE_LIMIT itself, is IRREGULAR.
+    """
+    table = {}
+    codes = np.arange(TABLE_LIMIT + 1, dtype=np.uint32)
+    codes[TABLE_LIMIT] = IRREGULAR
+    for ch in _candidates():
+        folded = _fold_char(ch, confusables)
+        if folded == ch:
+            continue
+        table[ord(ch)] = folded
+        if ord(ch) < TABLE_LIMIT:
+            codes[ord(ch)] = ord(folded) if len(folded) == 1 else IRREGULAR
+    return table, codes
+
+
+def latin_dominant(ascii_letters, non_ascii):
+    """The folding rule for look-alikes: fold them when ASCII letters are the majority script"""
+    return ascii_letters >= non_ascii
+
+
+def folds_confusables(text):
+    """Whether look-alike letters are folded in `text`.
+
+    Only text written mostly in ASCII letters has them folded to Latin;
+    in Russian or Greek text they are the real letters.
+    """
+    ascii_text = text.encode('ascii', 'ignore')
+    return latin_dominant(len(ascii_text.translate(None, _NON_LETTER_BYTES)), len(text) - len(ascii_text))
+
+
+def utf8_script_counts(data):
+    """ASCII letters and non-ASCII characters in UTF-8 bytes, for latin_dominant"""
+    return len(data.translate(None, _NON_LETTER_BYTES)), len(data.translate(None, _NON_LEAD_BYTES))
+
+
+def fold_text(text, confusables=None):
+    """Fold `text` for indicator matching.
+
+    Applies NFKC, lower-casing, look-alike folding, quote and dash
+    unification and zero-width stripping in one lookup per character.
+    NFKC is applied per character, so combining sequences are kept as
+    written rather than composed. `confusables` forces look-alike folding
+    on or off; by default folds_confusables decides from the text.
+
+    ASCII text is only lower-cased, as before folding existed.
+    """
+    if text.isascii():
+        return FoldedText(text.lower(), None)
+    if confusables is None:
+        confusables = folds_confusables(text)
+    table, lookup = _tables(bool(confusables))
+    codes = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+    folded = lookup[np.minimum(codes, TABLE_LIMIT)]
+    irregular = np.flatnonzero(folded == IRREGULAR)
+    if not len(irregular):
+        return FoldedText(folded.tobytes().decode('utf-32-le', 'surrogatepass'), None)
+
+    # Characters that vanish or expand: splice their folded strings in
+    pieces = [table.get(code, chr(code)) for code in codes[irregular].tolist()]
+    lengths = np.ones(len(codes), dtype=np.int64)
+    lengths[irregular] = [len(piece) for piece in pieces]
+    piece_codes = np.frombuffer(''.join(pieces).encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+    piece_lengths = lengths[irregular]
+    piece_starts = np.cumsum(lengths)[irregular] - piece_lengths
+    within = np.arange(len(piece_codes)) - np.repeat(np.cumsum(piece_lengths) - piece_lengths, piece_lengths)
+    expanded = np.repeat(folded, lengths)
+    expanded[np.repeat(piece_starts, piece_lengths) + within] = piece_codes
+    offsets = np.repeat(np.arange(len(codes), dtype=np.int64), lengths)
+    return FoldedText(expanded.tobytes().decode('utf-32-le', 'surrogatepass'), offsets)
@@ -0,0 +1,306 @@
+# ===============================
+# WEIGHT CALIBRATION
+# Fits pattern weights and scoring constants to a labelled corpus
+# ===============================
+#
+# Run with `python weight_calibration.py labelled.jsonl calibrated.json`.
+# Each record needs a text and a label: 'Low', 'Medium' or 'High' as in
+# the case studies, or a number between 0 and 1.
+
+import argparse
+import copy
+import re
+from multiprocessing import Pool
+
+import numpy as np
+
+from pattern_engine import PatternRecognitionEngine, score_patterns
+from pattern_registry import DEFAULT_SCORING, write_registry
+from score_corpus import iter_records
+from text_normalization import fold_text
+
+# Target risk per label; the bands mirror analysis_history.risk_band
+LABEL_TARGETS = {'low': 0.0, 'medium': 0.5, 'high': 1.0}
+
+# Floors that keep fitted values valid in a registry
+MIN_WEIGHT = 1e-3
+MIN_BOOST = 1.0
+
+# Documents handed to a worker at a time
+COUNT_CHUNK = 1000
+
+
+def label_targets(labels):
+    """Map labels to risk targets in [0, 1]"""
+    targets = []
+    for label in labels:
+        if isinstance(label, str) and label.strip().lower() in LABEL_TARGETS:
+            targets.append(LABEL_TARGETS[label.strip().lower()])
+            continue
+        try:
+            # CSV corpora carry numeric labels as strings
+            target = float(label) if not isinstance(label, bool) else None
+        except (TypeError, ValueError):
+            target = None
+        if target is None or not 0 <= target <= 1:
+            raise ValueError(f"Unusable label {label!r}; expected Low/Medium/High or a number in [0, 1]")
+        targets.append(target)
+    return np.array(targets)
+
+# -------------------------------
+# PATTERN COUNTS
+# -------------------------------
+def _chunk_counts(compiled, texts):
+    """Per-pattern hit totals and two-or-more-indicator flags for a list of texts"""
+    matcher = compiled.matcher
+    n_tables = len(compiled.patterns) + len(compiled.authenticity_patterns)
+    counts = np.zeros((len(texts), n_tables), dtype=np.float32)
+    multi = np.zeros((len(texts), len(compiled.patterns)), dtype=bool)
+    for row, text in enumerate(texts):
+        hits = matcher.count_hits(matcher.iter_matches(fold_text(str(text)).text))
+        if not hits:
+            continue
+        keywords = np.fromiter(hits, dtype=np.int64, count=len(hits))
+        columns = compiled.keyword_patterns[keywords]
+        counts[row] = np.bincount(columns, weights=list(hits.values()), minlength=n_tables)
+        multi[row] = np.bincount(columns, minlength=n_tables)[:len(compiled.patterns)] >= 2
+    return counts, multi
+
+
+_worker_compiled = None
+
+
+def _init_count_worker(compiled):
+    global _worker_compiled
+    _worker_compiled = compiled
+
+
+def _count_chunk(texts):
+    return _chunk_counts(_worker_compiled, texts)
+
+
+def _chunks(texts, size):
+    chunk = []
+    for text in texts:
+        chunk.append(text)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def pattern_counts(texts, compiled, workers=1):
+    """Count matrices for calibration: (counts, multi).
+
+    `counts` holds each document's hit total per pattern, disinformation
+    patterns first, then authenticity patterns (as the count columns of
+    pattern_features.feature_names). `multi` flags the disinformation
+    patterns that matched two or more distinct indicators.
+    """
+    if workers == 1:
+        parts = [_chunk_counts(compiled, chunk) for chunk in _chunks(texts, COUNT_CHUNK)]
+    else:
+        with Pool(workers, initializer=_init_count_worker, initargs=(compiled,)) as pool:
+            parts = list(pool.imap(_count_chunk, _chunks(texts, COUNT_CHUNK)))
+    if not parts:
+        return (np.zeros((0, len(compiled.patterns) + len(compiled.authenticity_patterns)), dtype=np.float32),
+                np.zeros((0, len(compiled.patterns)), dtype=bool))
+    return np.concatenate([c for c, _ in parts]), np.concatenate([m for _, m in parts])
+
+# -------------------------------
+# MODEL
+# -------------------------------
+class _Design:
+    """Count matrices laid out pattern-major, plus what stays fixed while fitting.
+
+    One row per pattern keeps every per-document reduction a sum or
+    maximum of a few contiguous rows.
+    """
+
+    def __init__(self, counts, multi):
+        self.n_patterns = np.shape(multi)[1]
+        self.counts = np.ascontiguousarray(np.asarray(counts, dtype=np.float64).T)
+        self.multi = np.ascontiguousarray(np.asarray(multi, dtype=bool).T)
+        self.present = self.counts > 0
+        self.detected = self.present[:self.n_patterns].sum(axis=0)
+        self.auth_detected = self.present[self.n_patterns:].sum(axis=0)
+
+
+def _predict(design, weights, scoring):
+    """Risk per document plus the intermediate arrays the gradient needs"""
+    parts = score_patterns(design.counts * weights[:, None], design.multi, design.n_patterns, scoring)
+    return parts['risk'], parts
+
+
+def predict_risk(counts, multi, weights, scoring):
+    """Overall risk per document, as PatternRecognitionEngine._score_hits computes it"""
+    return _predict(_Design(counts, multi), np.asarray(weights, dtype=np.float64), scoring)[0]
+
+
+def log_loss(risk, targets, eps=1e-6):
+    risk = np.clip(risk, eps, 1 - eps)
+    return float(-np.mean(targets * np.log(risk) + (1 - targets) * np.log(1 - risk)))
+
+
+def _gradients(design, weights, scoring, targets, eps=1e-6):
+    """Log loss and its (sub)gradient for the weights and each scoring constant"""
+    n_patterns = design.n_patterns
+    risk, p = _predict(design, weights, scoring)
+    clipped = np.clip(risk, eps, 1 - eps)
+    loss = float(-np.mean(targets * np.log(clipped) + (1 - targets) * np.log(1 - clipped)))
+    d_risk = (clipped - targets) / (clipped * (1 - clipped)) / max(1, len(targets))
+
+    discount = scoring['authenticity_discount']
+    # Scores capped at 1 and blends past 1 pass no gradient, as in the formula
+    d_base = d_risk * (1 - p['authenticity'] * discount)
+    d_blend = np.where((design.detected > 0) & (p['blend'] < 1), d_base, 0.0)
+    d_authenticity = np.where((design.auth_detected > 0) & (p['auth_mean'] < 1), -d_risk * p['base'] * discount, 0.0)
+
+    # Each pattern score feeds the mean, and the first highest one also the peak
+    d_scores = np.empty_like(p['raw'])
+    d_scores[:n_patterns] = design.present[:n_patterns] * (d_blend * scoring['average_weight']
+                                                           / np.maximum(1, design.detected))
+    unclaimed = design.detected > 0
+    for j in range(n_patterns):
+        top = unclaimed & (p['scores'][j] == p['peak'])
+        d_scores[j] += top * (d_blend * scoring['max_weight'])
+        unclaimed &= ~top
+    d_scores[n_patterns:] = design.present[n_patterns:] * (d_authenticity / np.maximum(1, design.auth_detected))
+    d_raw = np.where(p['raw'] < 1, d_scores, 0.0) * design.counts
+
+    boosted = d_raw[:n_patterns] * design.multi
+    d_weights = d_raw.sum(axis=1)
+    d_weights[:n_patterns] += boosted.sum(axis=1) * (scoring['multi_indicator_boost'] - 1)
+    d_scoring = {
+        'multi_indicator_boost': float(boosted.sum(axis=1) @ weights[:n_patterns]),
+        'average_weight': float(d_blend @ p['mean']),
+        'max_weight': float(d_blend @ p['peak']),
+        'authenticity_discount': float(-d_risk @ (p['base'] * p['authenticity']))
+    }
+    return loss, d_weights, d_scoring
+
+
+def _project(weights, scoring):
+    """Clamp parameters into the ranges a registry accepts"""
+    np.maximum(weights, MIN_WEIGHT, out=weights)
+    scoring['multi_indicator_boost'] = max(MIN_BOOST, scoring['multi_indicator_boost'])
+    scoring['average_weight'] = max(0.0, scoring['average_weight'])
+    scoring['max_weight'] = max(0.0, scoring['max_weight'])
+    scoring['authenticity_discount'] = min(1.0, max(0.0, scoring['authenticity_discount']))
+
+
+def fit_scoring(counts, multi, targets, weights, scoring=None, iterations=500, learning_rate=0.02):
+    """Fit pattern weights and scoring constants by minimizing log loss.
+
+    The model is the engine's own scoring formula, so the result can be
+    written straight into a registry. Starts from `weights` (one per count
+    column) and `scoring`, and runs full-batch Adam with every step
+    projected back into valid ranges. Each step is a handful of array
+    operations over the count matrices, so a million documents take
+    well under a second per step.
+
+    Returns (weights, scoring, history), where history holds the loss per
+    iteration.
+    """
+    design = _Design(counts, multi)
+    targets = np.asarray(targets, dtype=np.float64)
+    weights = np.array(weights, dtype=np.float64)
+    scoring = {**DEFAULT_SCORING, **(scoring or {})}
+    keys = list(DEFAULT_SCORING)
+
+    moment = np.zeros(len(weights) + len(keys))
+    velocity = np.zeros_like(moment)
+    history = []
+    for step in range(1, iterations + 1):
+        loss, d_weights, d_scoring = _gradients(design, weights, scoring, targets)
+        history.append(loss)
+        gradient = np.concatenate((d_weights, [d_scoring[key] for key in keys]))
+        moment = 0.9 * moment + 0.1 * gradient
+        velocity = 0.999 * velocity + 0.001 * gradient ** 2
+        update = learning_rate * (moment / (1 - 0.9 ** step)) / (np.sqrt(velocity / (1 - 0.999 ** step)) + 1e-8)
+        weights -= update[:len(weights)]
+        for key, delta in zip(keys, update[len(weights):]):
+            scoring[key] -= float(delta)
+        _project(weights, scoring)
+    history.append(log_loss(_predict(design, weights, scoring)[0], targets))
+    return weights, scoring, history
+
+# -------------------------------
+# REGISTRY OUTPUT
+# -------------------------------
+def next_version(version):
+    """Version for a registry derived from one at `version`"""
+    if isinstance(version, int):
+        return version + 1
+    match = re.search(r'(\d+)$', str(version))
+    if match:
+        return version[:match.start()] + str(int(match.group(1)) + 1)
+    return f'{version}.1'
+
+
+def calibrated_registry(compiled, weights, scoring, decimals=4):
+    """Registry mapping for `compiled` with fitted weights and scoring, one version on"""
+    registry = {
+        'version': next_version(compiled.version if compiled.version is not None else 0),
+        'patterns': copy.deepcopy(compiled.patterns),
+        'authenticity_patterns': copy.deepcopy(compiled.authenticity_patterns),
+        'scoring': {key: round(float(value), decimals) for key, value in scoring.items()}
+    }
+    pattern_ids = [*registry['patterns'], *registry['authenticity_patterns']]
+    tables = {**registry['patterns'], **registry['authenticity_patterns']}
+    for pattern_id, weight in zip(pattern_ids, weights):
+        tables[pattern_id]['weight'] = max(MIN_WEIGHT, round(float(weight), decimals))
+    return registry
+
+
+def calibrate_corpus(input_path, output_path, engine=None, fmt=None, text_field='text',
+                     label_field='risk_level', iterations=500, workers=1):
+    """Fit the engine's registry to a labelled corpus and write the result to `output_path`.
+
+    Returns a summary with the log loss before and after fitting.
+    """
+    engine = engine or PatternRecognitionEngine()
+    compiled = engine.compiled
+    labels = []
+
+    def texts():
+        for record in iter_records(input_path, fmt):
+            labels.append(record.get(label_field))
+            yield record.get(text_field) or ''
+
+    counts, multi = pattern_counts(texts(), compiled, workers)
+    targets = label_targets(labels)
+
+    initial = np.array([pattern['weight'] for pattern in
+                        [*compiled.patterns.values(), *compiled.authenticity_patterns.values()]])
+    weights, scoring, history = fit_scoring(counts, multi, targets, initial, compiled.scoring, iterations)
+    registry = calibrated_registry(compiled, weights, scoring)
+    write_registry(output_path, registry)
+    return {'documents': len(targets), 'version': registry['version'],
+            'loss_before': history[0], 'loss_after': history[-1]}
+
+# -------------------------------
+# COMMAND LINE
+# -------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fit pattern weights to a labelled corpus.')
+    parser.add_argument('input', help='labelled JSONL or CSV corpus')
+    parser.add_argument('output', help='registry file to write (.json, or .yaml with PyYAML)')
+    parser.add_argument('--format', choices=['jsonl', 'csv'], help='input format (default: from extension)')
+    parser.add_argument('--text-field', default='text', help='field holding the document text')
+    parser.add_argument('--label-field', default='risk_level', help='field holding the label')
+    parser.add_argument('--iterations', type=int, default=500, help='optimizer steps')
+    parser.add_argument('--workers', type=int, default=1, help='processes counting pattern hits')
+    parser.add_argument('--registry', help='registry to start from (default: patterns.json)')
+    args = parser.parse_args(argv)
+    summary = calibrate_corpus(
+        args.input, args.output, PatternRecognitionEngine(args.registry), args.format,
+        args.text_field, args.label_field, args.iterations, args.workers
+    )
+    print(f"Fitted {summary['documents']} documents: log loss {summary['loss_before']:.4f} -> "
+          f"{summary['loss_after']:.4f}; wrote version {summary['version']} to {args.output}")
+
+
+if __name__ == '__main__':
+    main()